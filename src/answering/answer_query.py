@@ -3,13 +3,34 @@ answer_query.py
 ---------------
 Full RAG pipeline orchestrator. Coordinates retrieval, generation,
 hallucination detection, and structured output formatting.
+
+Two entry points share the same pipeline:
+    answer_query()        → blocking, returns the structured dict
+    stream_answer_query() → yields answer tokens as they are generated,
+                            then the same structured dict as a final event
 """
 
 import json
-from src.vectorstore.chroma_store import create_chroma_collection
+from src.vectorstore.chroma_store import create_chroma_collection, create_child_collection
 from src.retrieval.retrieve_chunks import retrieve_chunks
-from src.generation.grounded_answer import generate_grounded_answer
+from src.retrieval.query_expansion import expanded_retrieve
+from src.retrieval.hierarchical_retrieval import retrieve_children, expand_context
+from src.reranking.rerank_chunks import rerank_chunks
+from src.generation.grounded_answer import generate_grounded_answer, stream_grounded_answer
 from src.evaluation.hallucination_detector import detect_hallucination
+from src.answering.evidence_gate import check_evidence, NOT_AVAILABLE_ANSWER
+from src.config.settings import TOP_K_RERANK, QUERY_EXPANSION_ENABLED, HIERARCHICAL_RETRIEVAL
+from src.utils.memory_profiler import profile_stage
+
+
+NO_CONTENT_RESULT = {
+    "answer": "No relevant content found.",
+    "sources": [],
+    "confidence_score": 0,
+    "confidence_level": "Low",
+    "grounded_in_context": False,
+    "grounding_similarity_score": 0
+}
 
 
 def classify_confidence(score):
@@ -22,20 +43,25 @@ def classify_confidence(score):
         return "Low"
 
 
-def answer_query(query, top_k=10):
+def retrieve_evidence(query, top_k=10, filters=None, timings=None):
     """
-    End-to-end RAG pipeline.
+    Steps 1–3 of the pipeline: load the collection, retrieve, rerank.
+    No LLM call is made, so this is also what the offline gate
+    calibration in evaluate_system.py runs.
 
-    Args:
-        query  : The user's question as a plain string.
-        top_k  : How many chunks to retrieve from ChromaDB before selecting top 3.
+    With HIERARCHICAL_RETRIEVAL, sentence-window children are retrieved
+    and reranked instead, and the top ones are expanded into their parent
+    sections within CONTEXT_TOKEN_BUDGET (see hierarchical_retrieval.py).
 
     Returns:
-        A structured dict with the answer, sources, confidence, and grounding info.
+        (docs, metadata, confidence_score, dense_score), or None if nothing
+        was retrieved. confidence_score is the reranker's sigmoid score;
+        dense_score is the cosine similarity of the closest chunk.
+        Stage durations are added to `timings` if a dict is passed.
     """
 
     # ── Step 1: Load ChromaDB collection ──────────────────────────────────────
-    collection = create_chroma_collection()
+    collection = create_child_collection() if HIERARCHICAL_RETRIEVAL else create_chroma_collection()
 
     # If the collection is empty (cold start), trigger ingestion.
     # The import lives INSIDE the if-block intentionally — we only need
@@ -45,43 +71,74 @@ def answer_query(query, top_k=10):
         run_ingestion()
 
     # ── Step 2: Retrieve relevant chunks ──────────────────────────────────────
-    retrieval_results = retrieve_chunks(collection, query, top_k=top_k)
+    # With expansion on, reformulations are searched concurrently and fused.
+    # Children are searched directly: expansion and the binary first stage
+    # index the flat collection only.
+    if HIERARCHICAL_RETRIEVAL:
+        retrieve = retrieve_children
+    else:
+        retrieve = expanded_retrieve if QUERY_EXPANSION_ENABLED else retrieve_chunks
+    with profile_stage("query.retrieve", timings):
+        retrieval_results = retrieve(collection, query, top_k=top_k, filters=filters)
     retrieved_docs = retrieval_results["documents"][0]
     retrieved_metadata = retrieval_results["metadatas"][0]
 
     if not retrieved_docs:
-        return {
-            "answer": "No relevant content found.",
-            "sources": [],
-            "confidence_score": 0,
-            "confidence_level": "Low",
-            "grounded_in_context": False,
-            "grounding_similarity_score": 0
-        }
-
-    # ── Step 3: Take top 3 chunks ──────────────────────────────────────────────
-    reranked_docs = retrieved_docs[:3]
-    reranked_metadata = retrieved_metadata[:3]
-    confidence_score = 0.75
+        return None
 
-    # ── Step 4: Generate grounded answer ──────────────────────────────────────
-    answer = generate_grounded_answer(query, reranked_docs)
+    # Embeddings are unit-length, so squared L2 distance d ↔ cosine 1 - d/2
+    dense_score = 1 - min(retrieval_results["distances"][0]) / 2
+
+    # ── Step 3: Rerank and keep the top chunks ────────────────────────────────
+    with profile_stage("query.rerank", timings):
+        reranked_docs, reranked_metadata, confidence_score = rerank_chunks(
+            query, retrieved_docs, retrieved_metadata, top_k=TOP_K_RERANK
+        )
+
+    # ── Step 3b: Expand children into budgeted parent context ─────────────────
+    if HIERARCHICAL_RETRIEVAL:
+        with profile_stage("query.expand_context", timings):
+            reranked_docs, reranked_metadata, _ = expand_context(reranked_metadata)
+
+    return reranked_docs, reranked_metadata, confidence_score, dense_score
+
+
+def _not_available_result(confidence_score, timings):
+    """Returned when the evidence gate fires — no LLM call was made."""
+    return {
+        "answer": NOT_AVAILABLE_ANSWER,
+        "sources": [],
+        "confidence_score": round(confidence_score, 2),
+        "confidence_level": classify_confidence(confidence_score),
+        "grounded_in_context": False,
+        "grounding_similarity_score": 0,
+        "evidence_gated": True,
+        "timings_ms": timings
+    }
+
+
+def _build_result(answer, docs, metadata, confidence_score, timings, llm_queue_ms):
+    """Steps 5–7 of the pipeline: grounding check, sources, structured output."""
 
     # ── Step 5: Hallucination detection ───────────────────────────────────────
-    grounded, grounding_score = detect_hallucination(answer, reranked_docs)
+    with profile_stage("query.grounding", timings):
+        grounded, grounding_score = detect_hallucination(answer, docs)
 
     # ── Step 6: Deduplicate sources ───────────────────────────────────────────
     unique_sources = []
     seen = set()
 
-    for meta in reranked_metadata:
-        key = (meta.get("section_number"), meta.get("section_title"))
-        if key not in seen:
-            seen.add(key)
-            unique_sources.append({
-                "section_number": meta.get("section_number"),
-                "section_title": meta.get("section_title")
-            })
+    for meta in metadata:
+        # A deduplicated chunk also cites every place its text was merged from
+        places = [meta] + json.loads(meta.get("references", "[]"))
+        for place in places:
+            key = (place.get("section_number"), place.get("section_title"))
+            if key not in seen:
+                seen.add(key)
+                unique_sources.append({
+                    "section_number": place.get("section_number"),
+                    "section_title": place.get("section_title")
+                })
 
     # ── Step 7: Return structured output ──────────────────────────────────────
     return {
@@ -90,14 +147,91 @@ def answer_query(query, top_k=10):
         "confidence_score": round(confidence_score, 2),
         "confidence_level": classify_confidence(confidence_score),
         "grounded_in_context": grounded,
-        "grounding_similarity_score": grounding_score
+        "grounding_similarity_score": grounding_score,
+        "timings_ms": timings,
+        "llm_queue_ms": llm_queue_ms
     }
 
 
+def answer_query(query, top_k=10, filters=None, priority="interactive", client_id=None):
+    """
+    End-to-end RAG pipeline.
+
+    Args:
+        query    : The user's question as a plain string.
+        top_k    : How many chunks to retrieve from ChromaDB before reranking.
+        filters  : Optional retrieval scope — {"source", "section", "tags"}.
+        priority : LLM scheduling class, "interactive" or "batch".
+        client_id: Caller identity for fair queuing of LLM calls.
+
+    Returns:
+        A structured dict with the answer, sources, confidence, and grounding info,
+        plus server-side stage durations under "timings_ms" and the time spent
+        waiting for LLM rate-limit budget under "llm_queue_ms" (part of
+        query.generate).
+    """
+
+    timings = {}
+    context = retrieve_evidence(query, top_k, filters, timings)
+
+    if context is None:
+        return dict(NO_CONTENT_RESULT, timings_ms=timings)
+
+    docs, metadata, confidence_score, dense_score = context
+
+    # Weak evidence → answer "not available" without spending an LLM call
+    if check_evidence(confidence_score, dense_score):
+        return _not_available_result(confidence_score, timings)
+
+    # ── Step 4: Generate grounded answer ──────────────────────────────────────
+    llm_timings = {}
+    with profile_stage("query.generate", timings):
+        answer = generate_grounded_answer(query, docs, priority, client_id, llm_timings)
+
+    return _build_result(answer, docs, metadata, confidence_score, timings, llm_timings.get("llm_queue"))
+
+
+def stream_answer_query(query, top_k=10, filters=None, priority="interactive", client_id=None):
+    """
+    Streaming version of answer_query().
+
+    Yields event dicts:
+        {"type": "token", "text": "..."}   — one per generated fragment
+        {"type": "result", "result": {...}} — once, the same dict answer_query()
+                                             returns, with the full answer
+    """
+
+    timings = {}
+    context = retrieve_evidence(query, top_k, filters, timings)
+
+    if context is None:
+        yield {"type": "result", "result": dict(NO_CONTENT_RESULT, timings_ms=timings)}
+        return
+
+    docs, metadata, confidence_score, dense_score = context
+
+    if check_evidence(confidence_score, dense_score):
+        yield {"type": "result", "result": _not_available_result(confidence_score, timings)}
+        return
+
+    # ── Step 4: Stream grounded answer ────────────────────────────────────────
+    fragments = []
+    llm_timings = {}
+    with profile_stage("query.generate", timings):
+        for fragment in stream_grounded_answer(query, docs, priority, client_id, llm_timings):
+            fragments.append(fragment)
+            yield {"type": "token", "text": fragment}
+
+    answer = "".join(fragments).strip()
+
+    result = _build_result(answer, docs, metadata, confidence_score, timings, llm_timings.get("llm_queue"))
+    yield {"type": "result", "result": result}
+
+
 if __name__ == "__main__":
     user_query = input("Enter your question: ")
     result = answer_query(user_query)
     print("\n==============================")
     print("STRUCTURED ENTERPRISE OUTPUT")
     print("==============================\n")
-    print(json.dumps(result, indent=4))
\ No newline at end of file
+    print(json.dumps(result, indent=4))
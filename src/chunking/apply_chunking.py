@@ -1,4 +1,7 @@
 from src.chunking.section_chunker import section_chunk_text
+from src.chunking.chunk_store import ChunkStore
+from src.chunking.token_chunker import token_chunk_documents
+from src.config.settings import CHUNKING_STRATEGY, CHUNK_MAX_CHARS
 
 
 def split_long_text(text, max_chars=1200):
@@ -22,10 +25,21 @@ def split_long_text(text, max_chars=1200):
     return chunks
 
 
-def chunk_clean_documents(documents):
+def chunk_clean_documents(documents, strategy=CHUNKING_STRATEGY):
+    """
+    Section-chunks cleaned documents into a ChunkStore.
+    Chunk ids are the store's row indices, global across documents.
 
-    all_chunks = []
-    global_chunk_id = 0
+    strategy "tokens" splits long sections within the embedder's token
+    limit (token_chunker.py); "chars" splits every CHUNK_MAX_CHARS.
+    """
+
+    if strategy == "tokens":
+        return token_chunk_documents(documents)
+    if strategy != "chars":
+        raise ValueError(f"Unknown CHUNKING_STRATEGY {strategy!r} — expected 'tokens' or 'chars'")
+
+    store = ChunkStore()
 
     for doc in documents:
         text = doc["text"]
@@ -34,19 +48,15 @@ def chunk_clean_documents(documents):
         sections = section_chunk_text(text)
 
         for section in sections:
-            sub_chunks = split_long_text(section["text"])
+            sub_chunks = split_long_text(section["text"], CHUNK_MAX_CHARS)
 
             for sub_text in sub_chunks:
-                all_chunks.append({
-                    "text": sub_text,
-                    "metadata": {
-                        "chunk_id": global_chunk_id,
-                        "source": metadata.get("source"),
-                        "section_number": section.get("section_number"),
-                        "section_title": section.get("section_title")
-                    }
-                })
-
-                global_chunk_id += 1
-
-    return all_chunks
+                store.append(
+                    sub_text,
+                    source=metadata.get("source"),
+                    section_number=section.get("section_number"),
+                    section_title=section.get("section_title"),
+                    tags=metadata.get("tags")
+                )
+
+    return store
@@ -0,0 +1,225 @@
+"""
+chunk_store.py
+--------------
+Compact, column-oriented container for chunks moving through ingestion.
+
+Place this file at: src/chunking/chunk_store.py
+
+Why not a list of dicts?
+    The old format was one dict plus one metadata dict per chunk:
+
+        {"text": "...", "metadata": {"chunk_id": 7, "source": "...", ...}}
+
+    That is several hundred bytes of Python object overhead per chunk
+    before any text. The same source string and section title are
+    repeated thousands of times, and store_chunks then rebuilt every
+    metadata dict again with str() values.
+
+    ChunkStore keeps the same information as columns:
+
+        _buffer       one contiguous str holding every chunk's text
+        _offsets      array('q') — chunk i is _buffer[_offsets[i]:_offsets[i+1]]
+        _source_ids   array('i') → interned (source, tags) table
+        _section_ids  array('i') → interned (section_number, section_title) table
+
+    Chunks are appended while chunking, the pieces are joined into the
+    buffer once on first read, and the same store object is handed from
+    chunk_clean_documents → embed_chunks → store_chunks without copying.
+
+    store[i] still returns the familiar {"text", "metadata"} dict, so code
+    written against the list-of-dicts format keeps working.
+
+    A chunk can also carry references to other (source, section) places
+    where the same text appears — see near_duplicates.py, which collapses
+    repeated boilerplate into one canonical chunk.
+"""
+
+from array import array
+
+
+class ChunkStore:
+    """Append-only columnar chunk container. See module docstring."""
+
+    __slots__ = (
+        "_parts",
+        "_buffer",
+        "_offsets",
+        "_source_ids",
+        "_section_ids",
+        "_sources",
+        "_source_lookup",
+        "_sections",
+        "_section_lookup",
+        "_references",
+    )
+
+    def __init__(self):
+        self._parts = []                  # text appended since the last join
+        self._buffer = ""
+        self._offsets = array("q", [0])
+        self._source_ids = array("i")
+        self._section_ids = array("i")
+        self._sources = []                # id → (source, tags)
+        self._source_lookup = {}          # (source, tags) → id
+        self._sections = []               # id → (section_number, section_title)
+        self._section_lookup = {}         # (section_number, section_title) → id
+        self._references = {}             # row → [(source id, section id), ...]
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a store from the legacy list of {"text", "metadata"} dicts."""
+        store = cls()
+        for record in records:
+            metadata = record["metadata"]
+            store.append(
+                record["text"],
+                source=metadata.get("source"),
+                section_number=metadata.get("section_number"),
+                section_title=metadata.get("section_title"),
+                tags=metadata.get("tags")
+            )
+        return store
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _intern(table, lookup, key):
+        ref = lookup.get(key)
+        if ref is None:
+            ref = lookup[key] = len(table)
+            table.append(key)
+        return ref
+
+    def append(self, text, source=None, section_number=None, section_title=None, tags=None):
+        """Adds one chunk. Returns its index (which is also its chunk_id)."""
+        self._parts.append(text)
+        self._offsets.append(self._offsets[-1] + len(text))
+
+        source_key = (source, tuple(tags) if tags else None)
+        self._source_ids.append(self._intern(self._sources, self._source_lookup, source_key))
+
+        section_key = (section_number, section_title)
+        self._section_ids.append(self._intern(self._sections, self._section_lookup, section_key))
+
+        return len(self._source_ids) - 1
+
+    def add_reference(self, i, refs):
+        """Records that chunk i's text also appears at `refs` (a refs() pair)."""
+        if refs == self.refs(i):
+            return
+        existing = self._references.setdefault(i, [])
+        if refs not in existing:
+            existing.append(refs)
+
+    def merge_into(self, i, j):
+        """Records chunk j's location, and any references it carries, on chunk i."""
+        self.add_reference(i, self.refs(j))
+        for refs in self._references.get(j, []):
+            self.add_reference(i, refs)
+
+    def select(self, rows):
+        """
+        Returns a new store holding only `rows`, in that order, renumbered
+        from 0. Interned ids are shared, so refs() values stay valid across
+        both stores.
+        """
+        self._join()
+        selected = ChunkStore()
+        selected._sources = self._sources
+        selected._source_lookup = self._source_lookup
+        selected._sections = self._sections
+        selected._section_lookup = self._section_lookup
+
+        for new_row, row in enumerate(rows):
+            selected._parts.append(self.text(row))
+            selected._offsets.append(selected._offsets[-1] + self._offsets[row + 1] - self._offsets[row])
+            selected._source_ids.append(self._source_ids[row])
+            selected._section_ids.append(self._section_ids[row])
+            if row in self._references:
+                selected._references[new_row] = list(self._references[row])
+
+        return selected
+
+    def _join(self):
+        """Folds pending appends into the contiguous buffer (once per write burst)."""
+        if self._parts:
+            self._buffer = "".join([self._buffer, *self._parts])
+            self._parts = []
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self._source_ids)
+
+    def text(self, i):
+        self._join()
+        return self._buffer[self._offsets[i]:self._offsets[i + 1]]
+
+    def texts(self, start=0, stop=None):
+        """Chunk texts for rows [start, stop) — the list encode() and ChromaDB expect."""
+        self._join()
+        stop = len(self) if stop is None else min(stop, len(self))
+        buffer, offsets = self._buffer, self._offsets
+        return [buffer[offsets[i]:offsets[i + 1]] for i in range(start, stop)]
+
+    def source(self, i):
+        return self._sources[self._source_ids[i]][0]
+
+    def section(self, i):
+        """(section_number, section_title) of chunk i."""
+        return self._sections[self._section_ids[i]]
+
+    def refs(self, i):
+        """
+        Interned (source id, section id) of chunk i. Chunks with equal refs
+        and no extra references have identical metadata apart from chunk_id.
+        """
+        return self._source_ids[i], self._section_ids[i]
+
+    def has_references(self, i):
+        return i in self._references
+
+    def references(self, i):
+        """
+        Other places chunk i's text appears, as metadata-style dicts. Each
+        carries its source's tags, so tag scopes on that document still
+        find the chunk.
+        """
+        references = []
+        for source_id, section_id in self._references.get(i, []):
+            source, tags = self._sources[source_id]
+            references.append({
+                "source": source,
+                "section_number": self._sections[section_id][0],
+                "section_title": self._sections[section_id][1],
+                "tags": list(tags) if tags else None
+            })
+        return references
+
+    def metadata(self, i):
+        source, tags = self._sources[self._source_ids[i]]
+        section_number, section_title = self._sections[self._section_ids[i]]
+        return {
+            "chunk_id": i,
+            "source": source,
+            "section_number": section_number,
+            "section_title": section_title,
+            "tags": list(tags) if tags else None,
+            "references": self.references(i) or None
+        }
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        return {"text": self.text(i), "metadata": self.metadata(i)}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def text_chars(self):
+        """Total characters of chunk text held."""
+        return self._offsets[-1]
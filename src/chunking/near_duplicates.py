@@ -0,0 +1,160 @@
+"""
+near_duplicates.py
+------------------
+Collapses near-duplicate chunks into one canonical chunk before embedding.
+
+Place this file at: src/chunking/near_duplicates.py
+
+Why?
+    clean_text() only drops exact duplicate lines within one page. The
+    policies repeat whole paragraphs — definitions, disclaimers, revision
+    tables — across sections and documents. Every copy got its own
+    embedding, its own slot in the index, and could take several of the
+    top-3 context slots with the same text.
+
+How it works (MinHash + LSH banding):
+    1. Each chunk becomes a set of word shingles (DEDUP_SHINGLE_WORDS words
+       each), hashed to integers.
+    2. A MinHash signature of DEDUP_NUM_PERM values is computed per chunk.
+       The fraction of equal positions in two signatures estimates the
+       Jaccard similarity of their shingle sets.
+    3. Signatures are cut into b bands of r rows, chosen so that the LSH
+       S-curve threshold (1/b)^(1/r) sits at DEDUP_THRESHOLD. Chunks that
+       share any band bucket become candidate pairs — no all-pairs compare.
+    4. Candidates whose estimated similarity is >= DEDUP_THRESHOLD are
+       merged with union-find.
+
+    Each group keeps its first chunk (in document order) as the canonical
+    one. The other copies' (source, section) locations are recorded as
+    references on it, so answers still cite every place the text appears
+    and scope filters on those sections still find it.
+"""
+
+import zlib
+
+import numpy as np
+
+from src.config.settings import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_SHINGLE_WORDS
+
+
+# Mersenne prime 2^61 - 1 — the modulus for the universal hash family
+_PRIME = np.uint64((1 << 61) - 1)
+
+# all-MiniLM-L6-v2 vectors: 384 float32 values
+EMBEDDING_BYTES = 384 * 4
+
+
+def _permutations(num_perm, seed=1):
+    """Fixed (a, b) coefficients, so signatures are stable across runs."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingle_hashes(text, shingle_words=DEDUP_SHINGLE_WORDS):
+    """crc32 of every run of `shingle_words` consecutive words, deduplicated."""
+    words = text.lower().split()
+    if len(words) <= shingle_words:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i:i + shingle_words])
+            for i in range(len(words) - shingle_words + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def minhash_signature(hashes, a, b):
+    """
+    Min over (a·x + b) mod p for each permutation. a, x and b are all
+    below 2^32, so a·x + b fits in uint64 without overflow.
+    """
+    values = (np.outer(a, hashes) + b[:, None]) % _PRIME
+    return values.min(axis=1)
+
+
+def choose_bands(num_perm, threshold):
+    """(bands, rows) with bands·rows <= num_perm whose S-curve threshold is closest."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def deduplicate_chunks(store, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM,
+                       shingle_words=DEDUP_SHINGLE_WORDS):
+    """
+    Collapses near-duplicate chunks of a ChunkStore.
+
+    Returns:
+        (deduplicated_store, stats) — stats has chunks_in, chunks_out,
+        duplicates_removed, bytes_saved (chunk text, UTF-8),
+        embeddings_saved and embedding_bytes_saved.
+    """
+    n = len(store)
+    a, b = _permutations(num_perm)
+    signatures = np.empty((n, num_perm), dtype=np.uint64)
+    texts = store.texts()
+
+    for i, text in enumerate(texts):
+        signatures[i] = minhash_signature(shingle_hashes(text, shingle_words), a, b)
+
+    # ── LSH banding: only chunks sharing a bucket are ever compared ──────────
+    bands, rows = choose_bands(num_perm, threshold)
+    parent = list(range(n))
+
+    for band in range(bands):
+        buckets = {}
+        block = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            buckets.setdefault(block[i].tobytes(), []).append(i)
+
+        for members in buckets.values():
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    root_i, root_j = _find(parent, i), _find(parent, j)
+                    if root_i == root_j:
+                        continue
+                    similarity = np.count_nonzero(signatures[i] == signatures[j]) / num_perm
+                    if similarity >= threshold:
+                        # Lowest index wins, so the canonical chunk is the first copy
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # ── Collapse each group into its canonical chunk ──────────────────────────
+    keep = []
+    bytes_saved = 0
+
+    for i in range(n):
+        root = _find(parent, i)
+        if root == i:
+            keep.append(i)
+            continue
+        store.merge_into(root, i)
+        bytes_saved += len(texts[i].encode("utf-8"))
+
+    removed = n - len(keep)
+    deduplicated = store.select(keep) if removed else store
+
+    return deduplicated, {
+        "chunks_in": n,
+        "chunks_out": len(keep),
+        "duplicates_removed": removed,
+        "bytes_saved": bytes_saved,
+        "embeddings_saved": removed,
+        "embedding_bytes_saved": removed * EMBEDDING_BYTES
+    }
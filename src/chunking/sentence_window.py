@@ -0,0 +1,99 @@
+"""
+sentence_window.py
+------------------
+Parent–child chunking for hierarchical retrieval.
+
+Place this file at: src/chunking/sentence_window.py
+
+Why?
+    A flat chunk is a whole section (or a CHUNK_MAX_CHARS slice of one).
+    That size is a compromise: big enough to answer from, too big to embed
+    precisely — one vector has to stand for every sentence in it — and
+    all of it goes to the LLM even when one sentence holds the answer.
+
+    Hierarchical retrieval splits the two jobs:
+        parent  one section from section_chunk_text(), kept as a list of
+                sentences. Never embedded; only read when assembling context.
+        child   CHILD_WINDOW_SENTENCES consecutive sentences of one parent.
+                Small, so its embedding (and the reranker's score) is about
+                one point. Its metadata links it back to the parent and to
+                the sentence range it covers.
+
+    At query time children are searched and reranked, and
+    hierarchical_retrieval.expand_context() grows each hit into its
+    parent's neighbouring sentences until CONTEXT_TOKEN_BUDGET is spent.
+"""
+
+import re
+
+from src.chunking.section_chunker import section_chunk_text
+from src.config.settings import CHILD_WINDOW_SENTENCES
+
+
+# A sentence ends at . ! or ? followed by whitespace, except after a
+# number ("3. Scope"). Cleaned PDF text keeps layout line breaks
+# mid-sentence, so a newline only ends a sentence before a list item
+# ("- ", "• ", "a) ", "3. ").
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])(?<!\d\.)\s+|\n(?=[ \t]*(?:[-•*▪●]|\d+[.)]|[a-z][.)])\s)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def split_sentences(text):
+    """Sentences of `text`, each on one line with whitespace collapsed."""
+    sentences = (_WHITESPACE.sub(" ", part).strip() for part in _SENTENCE_BREAK.split(text))
+    return [sentence for sentence in sentences if sentence]
+
+
+def sentence_starts(text):
+    """Character offsets where a new sentence of `text` begins (0 excluded)."""
+    return [match.end() for match in _SENTENCE_BREAK.finditer(text)]
+
+
+def build_hierarchy(documents, window=CHILD_WINDOW_SENTENCES):
+    """
+    Splits documents into section parents and sentence-window children.
+
+    Args:
+        documents : list of {"text", "metadata"} (the merged, cleaned document).
+        window    : sentences per child.
+
+    Returns:
+        (parents, children)
+        parents  : list of {"sentences", "metadata"}; parent_id is the index.
+        children : list of {"text", "metadata"} — the legacy chunk record
+                   format, so embed_chunks() takes it as-is. Metadata has the
+                   parent's source, section and tags plus parent_id,
+                   sent_start and sent_end (a half-open sentence range).
+    """
+    parents = []
+    children = []
+
+    for doc in documents:
+        for section in section_chunk_text(doc["text"]):
+            # The heading line is a sentence of its own, so the first
+            # child is not "3.1 Scope This policy applies ..."
+            heading, _, body = section["text"].partition("\n")
+            sentences = split_sentences(heading) + split_sentences(body)
+
+            parent_id = len(parents)
+            metadata = {
+                "source": doc["metadata"].get("source"),
+                "section_number": section["section_number"],
+                "section_title": section["section_title"],
+                "tags": doc["metadata"].get("tags")
+            }
+            parents.append({"sentences": sentences, "metadata": metadata})
+
+            for start in range(0, len(sentences), window):
+                stop = min(start + window, len(sentences))
+                children.append({
+                    "text": " ".join(sentences[start:stop]),
+                    "metadata": {
+                        **metadata,
+                        "parent_id": parent_id,
+                        "sent_start": start,
+                        "sent_end": stop
+                    }
+                })
+
+    return parents, children
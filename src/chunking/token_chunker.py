@@ -0,0 +1,217 @@
+"""
+token_chunker.py
+----------------
+Tokenizer-aware chunking: sections are cut on sentence boundaries within
+the embedding model's sequence limit.
+
+Place this file at: src/chunking/token_chunker.py
+
+Why?
+    split_long_text() cuts sections every CHUNK_MAX_CHARS (1200)
+    characters. all-MiniLM-L6-v2 reads at most 256 word-pieces, and 1200
+    characters of policy text is often more than that. encode() silently
+    drops the rest, so the tail of those chunks never reaches the index.
+    The chunk is still stored whole and sent whole to the LLM.
+
+How it works:
+    1. Every section of every document is tokenized in ONE call to the
+       embedder's own fast (Rust) tokenizer, without special tokens and
+       with offset mappings. Each token maps to a character span of the
+       original text.
+    2. Sentence starts (sentence_window.sentence_starts) become token
+       indices. A chunk ends at the last sentence boundary that fits in
+       CHUNK_MAX_TOKENS. A single sentence longer than that is cut at the
+       last word start that fits instead.
+    3. The next chunk starts at the earliest sentence boundary within the
+       last CHUNK_OVERLAP_TOKENS tokens, or at a word start if there is
+       none. Overlap never exceeds the setting.
+    4. Chunk text is sliced from the original string by character offsets,
+       so whitespace and casing are untouched.
+
+    With the default budget (max_seq_length minus [CLS]/[SEP]) no chunk is
+    truncated by the encoder.
+
+Embedding batches:
+    length_sorted_batches() groups chunks longest-first into batches whose
+    padded size (chunks × longest chunk) stays under EMBED_BATCH_TOKENS.
+    Short chunks then share large batches, and no batch pads to a length
+    far beyond its contents. embed_chunks() encodes batch by batch.
+
+Compare with the character splitter:
+    python -m src.evaluation.benchmark_chunking
+"""
+
+from bisect import bisect_left, bisect_right
+
+from src.chunking.chunk_store import ChunkStore
+from src.chunking.section_chunker import section_chunk_text
+from src.chunking.sentence_window import sentence_starts
+from src.embeddings.inference import get_embedding_model
+from src.config.settings import (
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    EMBED_BATCH_TOKENS,
+    EMBED_MAX_BATCH_SIZE
+)
+
+
+def get_tokenizer():
+    """
+    The embedder's fast tokenizer and its sequence limit, in word-pieces
+    including special tokens.
+    """
+    model = get_embedding_model()
+    return model.tokenizer, model.max_seq_length
+
+
+def default_max_tokens(tokenizer, max_seq_length):
+    """CHUNK_MAX_TOKENS, or the encoder limit minus special tokens if unset."""
+    return CHUNK_MAX_TOKENS or max_seq_length - tokenizer.num_special_tokens_to_add()
+
+
+def _is_word_start(offsets, i):
+    return i == 0 or offsets[i][0] > offsets[i - 1][1]
+
+
+def token_spans(text, offsets, max_tokens, overlap=CHUNK_OVERLAP_TOKENS):
+    """
+    (start, stop) token ranges of the chunks of one text.
+
+    Args:
+        offsets    : (char_start, char_end) per token, from the tokenizer.
+        max_tokens : tokens per chunk.
+        overlap    : tokens the next chunk may repeat from this one.
+    """
+    n = len(offsets)
+    if n <= max_tokens:
+        return [(0, n)] if n else []
+
+    token_starts = [start for start, _ in offsets]
+    boundaries = sorted({bisect_left(token_starts, pos) for pos in sentence_starts(text)} - {0, n})
+
+    spans = []
+    start = stop = 0
+
+    while True:
+        limit = start + max_tokens
+        if limit >= n:
+            spans.append((start, n))
+            return spans
+
+        # Last sentence boundary that fits, else the last word start. It
+        # must pass the previous chunk's end, or overlap alone would be
+        # re-emitted as ever-shorter chunks.
+        floor = max(start, stop)
+        k = bisect_right(boundaries, limit) - 1
+        if k >= 0 and boundaries[k] > floor:
+            stop = boundaries[k]
+        else:
+            stop = next((i for i in range(limit, floor, -1) if _is_word_start(offsets, i)), limit)
+        spans.append((start, stop))
+
+        # Overlap: earliest sentence (else word) start in the last `overlap` tokens
+        next_start = stop
+        if overlap > 0:
+            low = max(stop - overlap, start + 1)
+            j = bisect_left(boundaries, low)
+            if j < len(boundaries) and boundaries[j] < stop:
+                next_start = boundaries[j]
+            else:
+                next_start = next((i for i in range(low, stop) if _is_word_start(offsets, i)), stop)
+        start = next_start
+
+
+def token_split_texts(texts, tokenizer, max_tokens, overlap=CHUNK_OVERLAP_TOKENS):
+    """Chunk texts for each input text, tokenized as one batch."""
+    if not texts:
+        return []
+    encoding = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+
+    return [
+        [text[offsets[start][0]:offsets[stop - 1][1]] for start, stop in token_spans(text, offsets, max_tokens, overlap)]
+        for text, offsets in zip(texts, encoding["offset_mapping"])
+    ]
+
+
+def token_chunk_documents(documents, max_tokens=None, overlap=CHUNK_OVERLAP_TOKENS):
+    """
+    Section-chunks cleaned documents into a ChunkStore, like
+    chunk_clean_documents(), with token-budgeted splits.
+    """
+    tokenizer, max_seq_length = get_tokenizer()
+    max_tokens = max_tokens or default_max_tokens(tokenizer, max_seq_length)
+
+    sections = [
+        (section, doc["metadata"])
+        for doc in documents
+        for section in section_chunk_text(doc["text"])
+    ]
+    pieces = token_split_texts([section["text"] for section, _ in sections], tokenizer, max_tokens, overlap)
+
+    store = ChunkStore()
+    for (section, metadata), sub_chunks in zip(sections, pieces):
+        for sub_text in sub_chunks:
+            store.append(
+                sub_text,
+                source=metadata.get("source"),
+                section_number=section.get("section_number"),
+                section_title=section.get("section_title"),
+                tags=metadata.get("tags")
+            )
+
+    return store
+
+
+def token_lengths(texts, tokenizer):
+    """Word-pieces per text, special tokens included, before truncation."""
+    if not texts:
+        return []
+    encoding = tokenizer(texts, add_special_tokens=True, verbose=False)
+    return [len(ids) for ids in encoding["input_ids"]]
+
+
+def truncation_stats(texts, tokenizer=None, max_seq_length=None):
+    """
+    How much of `texts` the encoder would never see.
+
+    Returns:
+        dict with chunks, truncated (chunks over max_seq_length),
+        truncated_fraction, tokens and dropped_fraction (share of all
+        tokens beyond the limit).
+    """
+    if tokenizer is None:
+        tokenizer, max_seq_length = get_tokenizer()
+
+    lengths = token_lengths(texts, tokenizer)
+    truncated = sum(length > max_seq_length for length in lengths)
+    tokens = sum(lengths)
+    dropped = sum(max(0, length - max_seq_length) for length in lengths)
+
+    return {
+        "chunks": len(lengths),
+        "truncated": truncated,
+        "truncated_fraction": truncated / len(lengths) if lengths else 0.0,
+        "tokens": tokens,
+        "dropped_fraction": dropped / tokens if tokens else 0.0
+    }
+
+
+def length_sorted_batches(lengths, max_batch_tokens=EMBED_BATCH_TOKENS, max_batch_size=EMBED_MAX_BATCH_SIZE):
+    """
+    Index batches, longest chunks first, each with padded size
+    (len(batch) × its longest length) within max_batch_tokens.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches = []
+    batch = []
+
+    for i in order:
+        # Longest-first, so the batch's first length is its padded length
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * lengths[batch[0]] > max_batch_tokens):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+
+    if batch:
+        batches.append(batch)
+    return batches
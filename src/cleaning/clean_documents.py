@@ -1,12 +1,14 @@
-from src.cleaning.text_cleaner import clean_text
+from src.cleaning.cleaning_engine import clean_document_pages
 
 def clean_documents(documents):
-    cleaned_docs = []
+    # Single-pass engine with per-document boilerplate detection — see
+    # cleaning_engine.py. clean_text() in text_cleaner.py is the old path.
+    cleaned_docs, stats = clean_document_pages(documents)
 
-    for doc in documents:
-        cleaned_docs.append({
-            "text": clean_text(doc["text"]),
-            "metadata": doc["metadata"]
-        })
+    print(
+        f"Pages cleaned: {stats['pages']} "
+        f"({stats['boilerplate_lines']} repeated header/footer lines detected, "
+        f"{stats['chars_in']} → {stats['chars_out']} chars)"
+    )
 
-    return cleaned_docs
\ No newline at end of file
+    return cleaned_docs
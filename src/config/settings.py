@@ -16,10 +16,15 @@ NOTE: Gemini has been fully removed. This project uses Groq exclusively.
 """
 
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Project root (two levels up from src/config/) — used to resolve data paths
+# the same way run_ingestion.py does, regardless of the launch directory.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 # ==========================================
 # LLM — Groq
@@ -35,6 +40,55 @@ if not GROQ_API_KEY:
     )
 
 
+# ==========================================
+# LLM Rate Limits (client-side scheduler)
+# ==========================================
+
+# Groq limits for the API key — requests and tokens per minute. The
+# scheduler paces calls to stay inside them (see src/llm/scheduler.py).
+GROQ_RPM_LIMIT = int(os.getenv("GROQ_RPM_LIMIT", 30))
+GROQ_TPM_LIMIT = int(os.getenv("GROQ_TPM_LIMIT", 6000))
+
+# Completion tokens assumed for a call without max_tokens, until Groq
+# reports the real usage
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", 300))
+
+# Longest a request may wait for rate-limit budget before failing
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", 60))
+
+# Retries after a 429, 5xx or dropped connection. The Groq SDK's own
+# retries are off, so every attempt goes through the buckets.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+
+
+# ==========================================
+# Text Cleaning
+# ==========================================
+
+# Header/footer patterns always removed, as JSON regex list (case-insensitive).
+# Repeated headers of other documents are found automatically (below).
+CLEANING_HEADER_PATTERNS = json.loads(os.getenv(
+    "CLEANING_HEADER_PATTERNS",
+    json.dumps([r"INFORMATION\s+SECURITY\s+&\s+MANAGEMENT\s+POLICY\s*\d*"])
+))
+
+# A line (page-counter digits ignored) repeated on at least this fraction
+# of a document's pages — and on at least BOILERPLATE_MIN_PAGES pages — is
+# treated as a running header/footer and dropped
+BOILERPLATE_MIN_PAGE_FRACTION = float(os.getenv("BOILERPLATE_MIN_PAGE_FRACTION", 0.5))
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", 3))
+
+# Only this many lines at the top and bottom of each page are candidates;
+# pages with no more than twice as many lines are not counted
+BOILERPLATE_EDGE_LINES = int(os.getenv("BOILERPLATE_EDGE_LINES", 3))
+
+# Longer lines are content, never boilerplate
+BOILERPLATE_MAX_LINE_CHARS = int(os.getenv("BOILERPLATE_MAX_LINE_CHARS", 120))
+
+# Worker processes for per-page cleaning; 1 cleans in-process
+CLEANING_WORKERS = int(os.getenv("CLEANING_WORKERS", 1))
+
+
 # ==========================================
 # RAG Pipeline Config
 # ==========================================
@@ -49,9 +103,198 @@ TOP_K_RERANK = int(os.getenv("TOP_K_RERANK", 3))
 CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", 1200))
 
 
+# ==========================================
+# Chunking
+# ==========================================
+
+# "tokens" cuts sections on sentence boundaries within the embedding
+# model's token limit (token_chunker.py); "chars" is the old
+# CHUNK_MAX_CHARS split
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "tokens")
+
+# Word-pieces per chunk — 0 means the encoder's max_seq_length minus its
+# special tokens (254 for all-MiniLM-L6-v2)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 0))
+
+# Word-pieces repeated from the end of one chunk at the start of the next
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+
+# Embedding batches: padded tokens per batch (size × longest chunk) and
+# chunks per batch
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", 4096))
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", 64))
+
+
+# ==========================================
+# CPU Inference
+# ==========================================
+
+# "float" (default) or "int8" — dynamic int8 quantization of the Linear
+# layers of the MiniLM embedder and the cross-encoder. Corpus and query
+# embeddings always share one backend. Check accuracy first with
+# python -m src.evaluation.check_quantization
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "float").lower()
+
+# torch intra-op threads per worker process; 0 keeps torch's default (all
+# cores). With several uvicorn workers, set cores / workers to avoid
+# oversubscription.
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", 0))
+
+# Cross-encoder pairs scored per forward pass. Pairs are sorted by length
+# first, so each batch pads to similar lengths.
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 16))
+
+
+# ==========================================
+# Hierarchical Retrieval
+# ==========================================
+
+# Search small sentence-window children, then send the LLM only as much of
+# their parent sections as CONTEXT_TOKEN_BUDGET allows
+HIERARCHICAL_RETRIEVAL = os.getenv("HIERARCHICAL_RETRIEVAL", "false").lower() == "true"
+
+# Sentences per child chunk
+CHILD_WINDOW_SENTENCES = int(os.getenv("CHILD_WINDOW_SENTENCES", 2))
+
+# Estimated tokens of context (all chunks together) sent to the LLM
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 600))
+
+
 # ==========================================
 # Hallucination Detection
 # ==========================================
 
 # Cosine similarity threshold — answers below this are flagged as ungrounded
-GROUNDING_THRESHOLD = float(os.getenv("GROUNDING_THRESHOLD", 0.65))
\ No newline at end of file
+GROUNDING_THRESHOLD = float(os.getenv("GROUNDING_THRESHOLD", 0.65))
+
+# ==========================================
+# Retrieval Scoping
+# ==========================================
+
+# Scoped queries matching at most this many chunks skip the HNSW index and
+# are scored exactly against the candidate subset instead
+SCOPE_EXACT_SCAN_MAX = int(os.getenv("SCOPE_EXACT_SCAN_MAX", 256))
+
+# Optional tags per source document, as JSON:
+#   {"Information Security & Management Policy v3.pdf": ["security", "isms"]}
+DOCUMENT_TAGS = json.loads(os.getenv("DOCUMENT_TAGS", "{}"))
+
+
+# ==========================================
+# Binary First-Stage Index
+# ==========================================
+
+# Two-stage retrieval: scan sign-binarized embeddings (48 bytes per vector)
+# by Hamming distance, then rescore the candidates at full precision. Only
+# the codes stay in process memory; candidate vectors are read from ChromaDB.
+BINARY_INDEX_ENABLED = os.getenv("BINARY_INDEX_ENABLED", "false").lower() == "true"
+
+# How many Hamming-nearest candidates are rescored with full-precision vectors
+BINARY_INDEX_CANDIDATES = int(os.getenv("BINARY_INDEX_CANDIDATES", 200))
+
+
+# ==========================================
+# Query Embedding Cache
+# ==========================================
+
+# LRU bounds — whichever is hit first triggers eviction.
+# One MiniLM vector is 384 float32 values = 1.5 KB.
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 10000))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+# Frequent questions embedded at startup (one per line, '#' for comments)
+QUERY_CACHE_SEED_FILE = os.getenv(
+    "QUERY_CACHE_SEED_FILE",
+    os.path.join(BASE_DIR, "data", "frequent_questions.txt")
+)
+
+
+# ==========================================
+# Evidence Gate
+# ==========================================
+
+# Skip the LLM call entirely when retrieval evidence is too weak to answer.
+# Calibrate the thresholds with: python -m src.evaluation.evaluate_system --calibrate-gate
+EVIDENCE_GATE_ENABLED = os.getenv("EVIDENCE_GATE_ENABLED", "true").lower() == "true"
+
+# Minimum reranker confidence (sigmoid of the best cross-encoder score)
+EVIDENCE_MIN_RERANK_SCORE = float(os.getenv("EVIDENCE_MIN_RERANK_SCORE", 0.01))
+
+# Minimum cosine similarity between the query and the closest retrieved chunk
+EVIDENCE_MIN_DENSE_SCORE = float(os.getenv("EVIDENCE_MIN_DENSE_SCORE", 0.15))
+
+
+# ==========================================
+# Query Expansion
+# ==========================================
+
+# Retrieve with several reformulations of the query and fuse the rankings
+QUERY_EXPANSION_ENABLED = os.getenv("QUERY_EXPANSION_ENABLED", "false").lower() == "true"
+
+# Maximum reformulations on top of the original query
+QUERY_EXPANSION_MAX = int(os.getenv("QUERY_EXPANSION_MAX", 3))
+
+# Also ask the LLM for rewrites (costs one small Groq call per query)
+QUERY_EXPANSION_USE_LLM = os.getenv("QUERY_EXPANSION_USE_LLM", "false").lower() == "true"
+
+# Expansions not finished within this budget are dropped — the original
+# query is always waited for
+QUERY_EXPANSION_BUDGET_MS = int(os.getenv("QUERY_EXPANSION_BUDGET_MS", 300))
+
+# Reciprocal rank fusion constant: score = sum(1 / (RRF_K + rank))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+
+# ==========================================
+# Memory Profiling
+# ==========================================
+
+# Sample RSS and tracemalloc snapshots around every pipeline stage.
+# Off by default — tracemalloc slows Python allocations noticeably.
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "false").lower() == "true"
+
+# How many top allocation sites (file:line) to print per stage
+MEMORY_PROFILING_TOP = int(os.getenv("MEMORY_PROFILING_TOP", 5))
+
+
+# ==========================================
+# Vector Store Writes
+# ==========================================
+
+# Chunks per collection.add() call. ChromaDB only accepts embeddings as
+# Python lists, so each batch is converted on its own — peak memory for that
+# conversion is one batch, not the whole corpus.
+STORE_BATCH_SIZE = int(os.getenv("STORE_BATCH_SIZE", 1000))
+
+
+# ==========================================
+# Near-Duplicate Elimination
+# ==========================================
+
+# Collapse repeated boilerplate (definitions, disclaimers, revision tables)
+# into one canonical chunk before embedding
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+
+# Estimated Jaccard similarity of word shingles at which two chunks count
+# as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+
+# MinHash signature length — more permutations, more accurate estimates
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 128))
+
+# Words per shingle
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", 5))
+
+
+# ==========================================
+# PDF Extraction Cache
+# ==========================================
+
+# Reuse extracted page text across ingestions of unchanged / appended PDFs
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+
+# SQLite file holding zlib-compressed page text
+PDF_CACHE_PATH = os.getenv(
+    "PDF_CACHE_PATH",
+    os.path.join(BASE_DIR, "data", "cache", "pdf_text.sqlite3")
+)
@@ -1,10 +1,36 @@
-from sentence_transformers import SentenceTransformer
+from src.chunking.chunk_store import ChunkStore
+from src.chunking.token_chunker import token_lengths, length_sorted_batches
+from src.embeddings.inference import get_embedding_model
+import numpy as np
 import gc
 
 def embed_chunks(chunks):
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    texts = [chunk["text"] for chunk in chunks]
-    embeddings = model.encode(texts, show_progress_bar=True, batch_size=8)
-    del model
+    # Shared with query embedding, so corpus and queries use the same backend
+    model = get_embedding_model()
+    if isinstance(chunks, ChunkStore):
+        texts = chunks.texts()
+    else:
+        texts = [chunk["text"] for chunk in chunks]
+
+    if not texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    # Length-sorted, token-budgeted batches (see token_chunker.py) — short
+    # chunks share big batches instead of padding to a fixed batch_size of 8
+    lengths = [min(length, model.max_seq_length) for length in token_lengths(texts, model.tokenizer)]
+    batches = length_sorted_batches(lengths)
+
+    # float32 ndarray (n_chunks, 384), in input order — handed to store_chunks as-is
+    embeddings = None
+    for batch in batches:
+        vectors = model.encode(
+            [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False, convert_to_numpy=True
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        embeddings[batch] = vectors
+
+    print(f"Embedded {len(texts)} chunks in {len(batches)} length-sorted batches")
+    del texts
     gc.collect()
-    return embeddings
\ No newline at end of file
+    return embeddings
@@ -0,0 +1,152 @@
+"""
+query_cache.py
+--------------
+Shared query-embedding model plus an LRU cache of query text → embedding.
+
+Place this file at: src/embeddings/query_cache.py
+
+Why cache query embeddings?
+    A large share of /ask traffic repeats the same handful of questions.
+    Each one used to pay a full MiniLM forward pass in retrieve_chunks.
+    Caching the vector turns a repeat into a dict lookup.
+
+    - Keys are normalized (lower-cased, whitespace collapsed). MiniLM's
+      tokenizer is uncased, so this never changes the embedding.
+    - Values are read-only float32 arrays (1.5 KB for 384 dims), the
+      same dtype encode() returns. No Python float lists are kept.
+    - The cache is bounded by entry count AND total bytes. The least
+      recently used entries are evicted first.
+    - warm_query_cache() pre-seeds it at startup from known frequent
+      questions, encoded in one batch.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.embeddings.inference import get_embedding_model
+from src.config.settings import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_BYTES
+
+
+# Module-level singletons — one cache per server process (the model is
+# shared through src/embeddings/inference.py)
+_cache = OrderedDict()
+_cache_bytes = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+# FastAPI runs sync endpoints in a thread pool, so guard the shared state
+_lock = threading.Lock()
+
+
+def get_query_model():
+    """Returns the process-wide MiniLM model used to embed queries."""
+    return get_embedding_model()
+
+
+def normalize_query(query):
+    """Cache key for a query: lower-cased with whitespace collapsed."""
+    return " ".join(query.lower().split())
+
+
+def _insert(key, embedding):
+    """Adds one entry and evicts from the LRU end until both bounds hold. Caller holds _lock."""
+    global _cache_bytes
+
+    if key in _cache:
+        return
+
+    embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+    embedding.setflags(write=False)
+
+    _cache[key] = embedding
+    _cache_bytes += embedding.nbytes
+
+    while _cache and (len(_cache) > QUERY_CACHE_MAX_ENTRIES or _cache_bytes > QUERY_CACHE_MAX_BYTES):
+        _, evicted = _cache.popitem(last=False)
+        _cache_bytes -= evicted.nbytes
+        _stats["evictions"] += 1
+
+
+def embed_queries(queries):
+    """
+    Embeds several queries, encoding only the cache misses — in one batch.
+
+    Returns:
+        float32 array of shape (len(queries), dim), in input order.
+    """
+    keys = [normalize_query(q) for q in queries]
+    found = {}
+
+    with _lock:
+        for key in keys:
+            embedding = _cache.get(key)
+            if embedding is not None:
+                _cache.move_to_end(key)
+                found[key] = embedding
+                _stats["hits"] += 1
+            else:
+                _stats["misses"] += 1
+
+    missing = list(dict.fromkeys(key for key in keys if key not in found))
+
+    if missing:
+        # Encode outside the lock — the forward pass is the slow part
+        encoded = get_query_model().encode(missing, convert_to_numpy=True)
+        with _lock:
+            for key, embedding in zip(missing, encoded):
+                _insert(key, embedding)
+                found[key] = embedding
+
+    return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+
+def embed_query(query):
+    """Embeds a single query through the cache. Returns a float32 vector."""
+    return embed_queries([query])[0]
+
+
+def load_seed_questions(path):
+    """Reads a frequent-questions file: one question per line, '#' starts a comment."""
+    with open(path, encoding="utf-8") as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def warm_query_cache(questions):
+    """
+    Pre-seeds the cache with known questions without counting them as
+    traffic — the hit ratio should reflect real requests only.
+    """
+    with _lock:
+        keys = list(dict.fromkeys(
+            normalize_query(q) for q in questions if normalize_query(q) not in _cache
+        ))
+
+    if not keys:
+        return 0
+
+    encoded = get_query_model().encode(keys, convert_to_numpy=True)
+    with _lock:
+        for key, embedding in zip(keys, encoded):
+            _insert(key, embedding)
+
+    return len(keys)
+
+
+def query_cache_stats():
+    """Snapshot of cache size and hit/miss counters, for the /metrics endpoint."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_cache),
+            "bytes": _cache_bytes,
+            "max_entries": QUERY_CACHE_MAX_ENTRIES,
+            "max_bytes": QUERY_CACHE_MAX_BYTES,
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "evictions": _stats["evictions"],
+            "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0
+        }
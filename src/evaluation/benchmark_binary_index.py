@@ -0,0 +1,207 @@
+"""
+benchmark_binary_index.py
+-------------------------
+Memory, latency and recall@k of the binary first-stage index against the
+current retrieve_chunks path (ChromaDB HNSW) and an exact float32 scan.
+
+Run with:
+    python -m src.evaluation.benchmark_binary_index
+    python -m src.evaluation.benchmark_binary_index --scale 200000 --candidates 100 200 500
+
+Two parts:
+    1. Real corpus — the ingested policy collection. Each question is
+       searched three ways:
+         exact      brute-force float32 scan (ground truth)
+         hnsw       collection.query(), i.e. today's retrieve_chunks
+         two-stage  binary Hamming scan + full-precision rescoring of the
+                    candidates, read from ChromaDB
+       recall@k is the fraction of the exact top-k each path returns.
+       Resident bytes per chunk compare an in-process float32 matrix
+       (what an exact scan keeps) with the binary index as it really
+       stands after the build — codes plus id bookkeeping.
+
+    2. Scaled corpus — one policy only gives a few hundred chunks, so the
+       real embeddings are replicated with small Gaussian perturbations up
+       to --scale vectors (mimicking many similar policies). Both stages
+       run in memory here, so the timings isolate the scans themselves
+       rather than ChromaDB's get() overhead.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.embeddings.query_cache import embed_queries, load_seed_questions
+from src.evaluation.evaluate_system import TEST_QUESTIONS
+from src.retrieval.retrieve_chunks import _binary_scan
+from src.vectorstore.binary_index import (
+    add_to_binary_index,
+    binarize,
+    binary_index_stats,
+    clear_binary_index,
+    hamming_distances,
+    nearest_rows,
+)
+from src.config.settings import QUERY_CACHE_SEED_FILE
+
+
+def _ms(seconds):
+    return seconds * 1000
+
+
+def _percentiles(values):
+    ordered = np.sort(np.asarray(values))
+    return {
+        "p50": round(float(np.percentile(ordered, 50)), 3),
+        "p95": round(float(np.percentile(ordered, 95)), 3)
+    }
+
+
+def _recall(found, truth):
+    return len(set(found) & set(truth)) / len(truth) if truth else 1.0
+
+
+def _questions():
+    questions = list(TEST_QUESTIONS)
+    try:
+        questions += load_seed_questions(QUERY_CACHE_SEED_FILE)
+    except FileNotFoundError:
+        pass
+    return questions
+
+
+# ── Part 1: real corpus through ChromaDB ─────────────────────────────────────
+
+def benchmark_real_corpus(collection, queries, top_k, n_candidates):
+    records = collection.get(include=["embeddings"])
+    ids = records["ids"]
+    vectors = np.asarray(records["embeddings"], dtype=np.float32)
+
+    # Build the binary index from exactly what the collection holds
+    clear_binary_index()
+    add_to_binary_index(ids, vectors)
+
+    recalls = {"hnsw": [], "two_stage": []}
+    latencies = {"exact": [], "hnsw": [], "two_stage": []}
+
+    for query in queries:
+        start = time.perf_counter()
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        truth = [ids[row] for row in np.argsort(distances)[:top_k]]
+        latencies["exact"].append(_ms(time.perf_counter() - start))
+
+        start = time.perf_counter()
+        hnsw = collection.query(query_embeddings=[query.tolist()], n_results=top_k)["ids"][0]
+        latencies["hnsw"].append(_ms(time.perf_counter() - start))
+
+        start = time.perf_counter()
+        two_stage = _binary_scan(collection, query, top_k, n_candidates)["ids"][0]
+        latencies["two_stage"].append(_ms(time.perf_counter() - start))
+
+        recalls["hnsw"].append(_recall(hnsw, truth))
+        recalls["two_stage"].append(_recall(two_stage, truth))
+
+    index = binary_index_stats()
+    return {
+        "vectors": len(ids),
+        "float32_bytes": int(vectors.nbytes),
+        "binary_bytes": int(binarize(vectors).nbytes),
+        "resident_bytes_per_chunk": {
+            "float32": round(vectors.nbytes / len(ids), 1) if ids else 0.0,
+            "binary_index": index["resident_bytes_per_vector"]
+        },
+        f"recall@{top_k}": {name: round(float(np.mean(r)), 4) for name, r in recalls.items()},
+        "latency_ms": {name: _percentiles(l) for name, l in latencies.items()}
+    }
+
+
+# ── Part 2: scaled in-memory corpus ──────────────────────────────────────────
+
+def _scaled_corpus(base, scale, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = base[rng.integers(0, len(base), size=scale)]
+    vectors = vectors + rng.normal(0, noise, size=vectors.shape).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def benchmark_scaled_corpus(base, queries, scale, noise, top_k, candidate_counts):
+    vectors = _scaled_corpus(base, scale, noise)
+    codes = binarize(vectors)
+
+    exact_ms, truths = [], []
+    for query in queries:
+        start = time.perf_counter()
+        # Unit vectors: the largest dot product is the smallest L2 distance
+        truths.append(nearest_rows(-(vectors @ query), top_k))
+        exact_ms.append(_ms(time.perf_counter() - start))
+
+    result = {
+        "vectors": scale,
+        "float32_bytes": int(vectors.nbytes),
+        "binary_bytes": int(codes.nbytes),
+        "exact_latency_ms": _percentiles(exact_ms),
+        "two_stage": {}
+    }
+
+    for n_candidates in candidate_counts:
+        latencies, recalls = [], []
+        for query, truth in zip(queries, truths):
+            start = time.perf_counter()
+            candidates = nearest_rows(hamming_distances(codes, binarize(query)), n_candidates)
+            rescored = candidates[nearest_rows(-(vectors[candidates] @ query), top_k)]
+            latencies.append(_ms(time.perf_counter() - start))
+            recalls.append(_recall(rescored.tolist(), truth.tolist()))
+
+        result["two_stage"][n_candidates] = {
+            f"recall@{top_k}": round(float(np.mean(recalls)), 4),
+            "latency_ms": _percentiles(latencies)
+        }
+
+    return result
+
+
+def print_report(real, scaled, top_k):
+    print("\n==============================")
+    print("BINARY INDEX BENCHMARK")
+    print("==============================\n")
+
+    print(f"Real corpus: {real['vectors']} vectors")
+    resident = real["resident_bytes_per_chunk"]
+    print(f"  memory   float32 {real['float32_bytes'] / 1024:.1f} KB   binary {real['binary_bytes'] / 1024:.1f} KB")
+    print(f"  resident per chunk   float32 matrix {resident['float32']} B   "
+          f"binary index {resident['binary_index']} B (codes + ids)")
+    for name in ("exact", "hnsw", "two_stage"):
+        latency = real["latency_ms"][name]
+        recall = real[f"recall@{top_k}"].get(name, 1.0)
+        print(f"  {name:<10} recall@{top_k} {recall:<7} p50 {latency['p50']} ms  p95 {latency['p95']} ms")
+
+    print(f"\nScaled corpus: {scaled['vectors']} vectors")
+    print(f"  memory   float32 {scaled['float32_bytes'] / 2**20:.1f} MB   binary {scaled['binary_bytes'] / 2**20:.1f} MB")
+    print(f"  exact scan        p50 {scaled['exact_latency_ms']['p50']} ms  p95 {scaled['exact_latency_ms']['p95']} ms")
+    for n_candidates, stats in scaled["two_stage"].items():
+        latency = stats["latency_ms"]
+        print(f"  two-stage @{n_candidates:<5} recall@{top_k} {stats[f'recall@{top_k}']:<7} "
+              f"p50 {latency['p50']} ms  p95 {latency['p95']} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the binary first-stage index.")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 200, 500],
+                        help="Rescoring candidate counts to compare (the first is used on the real corpus).")
+    parser.add_argument("--scale", type=int, default=100_000, help="Vectors in the scaled corpus.")
+    parser.add_argument("--noise", type=float, default=0.05, help="Per-dimension perturbation when scaling.")
+    args = parser.parse_args()
+
+    from src.run_ingestion import run_ingestion
+    collection = run_ingestion()
+
+    queries = embed_queries(_questions())
+    real = benchmark_real_corpus(collection, queries, args.top_k, args.candidates[0])
+
+    base = np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+    scaled = benchmark_scaled_corpus(base, queries, args.scale, args.noise, args.top_k, args.candidates)
+
+    print_report(real, scaled, args.top_k)
@@ -0,0 +1,111 @@
+"""
+benchmark_chunking.py
+---------------------
+Character chunking (split_long_text) vs. the tokenizer-aware chunking
+engine, measured on what the encoder actually sees and on ingestion
+throughput.
+
+Run with:
+    python -m src.evaluation.benchmark_chunking data/raw_pdfs/*.pdf
+    python -m src.evaluation.benchmark_chunking --synthetic-pages 200 --overlap 0 32
+
+Inputs are real PDFs (through the extraction cache) or the synthetic
+policy from benchmark_cleaning.py. Pages are cleaned and merged per
+source as in run_ingestion.py, then each configuration chunks and embeds
+the same text:
+
+    chars, batch 8          the old path: CHUNK_MAX_CHARS splits, encode()
+                            with a fixed batch_size of 8
+    tokens/<o>, batch 8     token chunking with <o> overlap tokens, old batching
+    tokens/<o>, sorted      token chunking with length-sorted, token-budgeted
+                            batches (what embed_chunks() does now)
+
+Reports, per configuration:
+    chunks, mean tokens    chunk count and mean word-pieces per chunk
+    truncated              share of chunks over the encoder's max_seq_length,
+                           and share of all tokens the encoder never sees
+    chunk s, embed s       time spent in each stage
+    chunks/s, KB/s         ingestion throughput over chunk + embed (KB of
+                           document text, so overlap is not counted twice)
+"""
+
+import argparse
+import time
+
+from src.chunking.apply_chunking import chunk_clean_documents
+from src.chunking.token_chunker import get_tokenizer, token_chunk_documents, truncation_stats
+from src.cleaning.cleaning_engine import clean_document_pages
+from src.embeddings.embed_chunks import embed_chunks
+from src.embeddings.inference import get_embedding_model
+from src.evaluation.benchmark_cleaning import synthetic_pages
+from src.ingestion.pdf_loader import load_pdf
+
+
+def merged_documents(pages):
+    """Cleaned pages joined into one document per source, as in run_ingestion."""
+    cleaned, _ = clean_document_pages(pages)
+    by_source = {}
+    for doc in cleaned:
+        by_source.setdefault(doc["metadata"].get("source"), []).append(doc["text"])
+    return [{"text": "\n\n".join(texts), "metadata": {"source": source}} for source, texts in by_source.items()]
+
+
+def _fixed_batch_embed(store):
+    """The old embed_chunks(): one encode() call, batch_size=8."""
+    return get_embedding_model().encode(store.texts(), batch_size=8, show_progress_bar=False, convert_to_numpy=True)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def benchmark(documents, overlaps):
+    tokenizer, max_seq_length = get_tokenizer()
+
+    configurations = [("chars, batch 8", lambda: chunk_clean_documents(documents, strategy="chars"), _fixed_batch_embed)]
+    for overlap in overlaps:
+        chunk = lambda overlap=overlap: token_chunk_documents(documents, overlap=overlap)
+        configurations.append((f"tokens/{overlap}, batch 8", chunk, _fixed_batch_embed))
+        configurations.append((f"tokens/{overlap}, sorted", chunk, embed_chunks))
+
+    # Load the model before timing anything
+    get_embedding_model().encode(["warm up"])
+
+    rows = []
+    for name, chunk, embed in configurations:
+        store, chunk_s = _timed(chunk)
+        _, embed_s = _timed(lambda: embed(store))
+        stats = truncation_stats(store.texts(), tokenizer, max_seq_length)
+        rows.append((name, stats, chunk_s, embed_s))
+
+    print("\n==============================")
+    print("CHUNKING BENCHMARK")
+    print("==============================\n")
+    print(f"Documents: {len(documents)}  Encoder limit: {max_seq_length} word-pieces\n")
+    print(f"  {'configuration':<20} {'chunks':>7} {'mean tok':>9} {'truncated':>10} {'tok lost':>9} "
+          f"{'chunk s':>8} {'embed s':>8} {'chunks/s':>9} {'KB/s':>7}")
+    kilobytes = sum(len(doc["text"]) for doc in documents) / 1024
+    for name, stats, chunk_s, embed_s in rows:
+        total_s = chunk_s + embed_s
+        print(
+            f"  {name:<20} {stats['chunks']:>7} {stats['tokens'] / max(stats['chunks'], 1):>9.0f} "
+            f"{stats['truncated_fraction']:>10.1%} {stats['dropped_fraction']:>9.1%} "
+            f"{chunk_s:>8.2f} {embed_s:>8.2f} {stats['chunks'] / total_s:>9.1f} {kilobytes / total_s:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark character vs. token-aware chunking.")
+    parser.add_argument("pdfs", nargs="*", help="PDFs to ingest (default: synthetic document).")
+    parser.add_argument("--synthetic-pages", type=int, default=200)
+    parser.add_argument("--overlap", type=int, nargs="+", default=[32], help="CHUNK_OVERLAP_TOKENS values to compare.")
+    args = parser.parse_args()
+
+    if args.pdfs:
+        pages = [doc for path in args.pdfs for doc in load_pdf(path)]
+    else:
+        pages = synthetic_pages(args.synthetic_pages)
+
+    benchmark(merged_documents(pages), args.overlap)
@@ -0,0 +1,157 @@
+"""
+benchmark_hierarchical.py
+-------------------------
+Flat section chunks vs. hierarchical (sentence-window child → parent)
+retrieval: how many tokens each sends to Groq, and how much of that is
+relevant.
+
+Run with:
+    python -m src.evaluation.benchmark_hierarchical
+    python -m src.evaluation.benchmark_hierarchical --budgets 300 600 1000 --json-out hier.json
+
+Both indexes are built from the same ingestion run. For every question
+(TEST_QUESTIONS plus the query cache seed file, if present) each mode
+retrieves top_k, reranks to TOP_K_RERANK, and builds the exact grounded
+prompt generation would send. No LLM calls are made.
+
+Reports, per mode:
+    prompt tokens     estimated like the LLM scheduler meters them
+                      (~4 characters per token), system prompt included
+    context tokens    the retrieved context alone
+    precision         share of context sentences the cross-encoder judges
+                      relevant to the question (sigmoid >= --relevance)
+    recall            relevant sentences found, out of all relevant
+                      sentences either mode retrieved (pooled)
+    latency           search + rerank (+ expand) per question, ms. The
+                      question is embedded once, untimed, and every mode
+                      searches with that same embedding.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.chunking.sentence_window import split_sentences
+from src.embeddings.inference import get_cross_encoder, predict_bucketed
+from src.embeddings.query_cache import embed_query, load_seed_questions
+from src.evaluation.evaluate_system import TEST_QUESTIONS
+from src.generation.grounded_answer import build_grounded_messages
+from src.llm.scheduler import estimate_text_tokens
+from src.reranking.rerank_chunks import rerank_chunks
+from src.retrieval.hierarchical_retrieval import search_children, expand_context
+from src.retrieval.retrieve_chunks import search_by_embedding
+from src.config.settings import TOP_K_RERANK, CONTEXT_TOKEN_BUDGET, QUERY_CACHE_SEED_FILE
+
+
+def flat_context(collection, question, embedding, top_k):
+    results = search_by_embedding(collection, embedding, top_k=top_k)
+    docs, _, _ = rerank_chunks(question, results["documents"][0], results["metadatas"][0], top_k=TOP_K_RERANK)
+    return docs
+
+
+def hierarchical_context(collection, question, embedding, top_k, budget):
+    results = search_children(collection, embedding, top_k=top_k)
+    _, metadata, _ = rerank_chunks(question, results["documents"][0], results["metadatas"][0], top_k=TOP_K_RERANK)
+    docs, _, _ = expand_context(metadata, budget)
+    return docs
+
+
+def context_sentences(docs):
+    """Sentences of a context, with expand_context's gap markers removed."""
+    return [sentence for doc in docs for sentence in split_sentences(doc.replace(" … ", " "))]
+
+
+def benchmark(flat_collection, child_collection, questions, top_k, budgets, relevance):
+    modes = {"flat": lambda q, e: flat_context(flat_collection, q, e, top_k)}
+    for budget in budgets:
+        modes[f"hierarchical@{budget}"] = (
+            lambda q, e, budget=budget: hierarchical_context(child_collection, q, e, top_k, budget)
+        )
+
+    encoder = get_cross_encoder()
+    rows = {name: {"prompt": [], "context": [], "precision": [], "recall": [], "ms": []} for name in modes}
+
+    for question in questions:
+        # Embedded once outside the timed region, so no mode pays (or
+        # skips) the encoder forward pass
+        embedding = embed_query(question)
+        contexts = {}
+        for name, build in modes.items():
+            start = time.perf_counter()
+            docs = build(question, embedding)
+            rows[name]["ms"].append((time.perf_counter() - start) * 1000)
+            contexts[name] = docs
+
+            messages = build_grounded_messages(question, docs)
+            rows[name]["prompt"].append(sum(estimate_text_tokens(m["content"]) for m in messages))
+            rows[name]["context"].append(sum(estimate_text_tokens(doc) for doc in docs))
+
+        # Judge every distinct sentence once, then pool the relevant ones
+        sentences = {name: set(context_sentences(docs)) for name, docs in contexts.items()}
+        pool = sorted(set().union(*sentences.values()))
+        scores = predict_bucketed(encoder, [(question, s) for s in pool])
+        relevant = {s for s, score in zip(pool, scores) if 1 / (1 + np.exp(-score)) >= relevance}
+
+        for name, found in sentences.items():
+            hits = len(found & relevant)
+            rows[name]["precision"].append(hits / len(found) if found else 0.0)
+            rows[name]["recall"].append(hits / len(relevant) if relevant else 1.0)
+
+    return {
+        name: {
+            "prompt_tokens": round(float(np.mean(r["prompt"])), 1),
+            "context_tokens": round(float(np.mean(r["context"])), 1),
+            "precision": round(float(np.mean(r["precision"])), 4),
+            "recall": round(float(np.mean(r["recall"])), 4),
+            "latency_ms": round(float(np.mean(r["ms"])), 1)
+        }
+        for name, r in rows.items()
+    }
+
+
+def print_report(report, n_questions):
+    flat_prompt = report["flat"]["prompt_tokens"]
+
+    print("\n==============================")
+    print("HIERARCHICAL RETRIEVAL BENCHMARK")
+    print("==============================\n")
+    print(f"Questions: {n_questions}\n")
+    print(f"  {'mode':<20} {'prompt tok':>10} {'vs flat':>8} {'context tok':>11} "
+          f"{'precision':>10} {'recall':>8} {'ms':>8}")
+    for name, row in report.items():
+        print(
+            f"  {name:<20} {row['prompt_tokens']:>10.0f} {row['prompt_tokens'] / flat_prompt:>7.0%} "
+            f"{row['context_tokens']:>11.0f} {row['precision']:>10.3f} {row['recall']:>8.3f} {row['latency_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare flat and hierarchical retrieval context.")
+    parser.add_argument("--top-k", type=int, default=10, help="Chunks / children retrieved before reranking.")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[CONTEXT_TOKEN_BUDGET],
+                        help="CONTEXT_TOKEN_BUDGET values to compare.")
+    parser.add_argument("--relevance", type=float, default=0.5,
+                        help="Cross-encoder sigmoid score at which a sentence counts as relevant.")
+    parser.add_argument("--json-out", default=None)
+    args = parser.parse_args()
+
+    from src.run_ingestion import run_ingestion
+    from src.vectorstore.chroma_store import create_child_collection
+
+    flat_collection = run_ingestion(hierarchical=True)
+
+    questions = list(TEST_QUESTIONS)
+    try:
+        questions += load_seed_questions(QUERY_CACHE_SEED_FILE)
+    except FileNotFoundError:
+        pass
+
+    report = benchmark(flat_collection, create_child_collection(), questions, args.top_k, args.budgets, args.relevance)
+    print_report(report, len(questions))
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Full report written to {args.json_out}")
@@ -0,0 +1,156 @@
+"""
+check_quantization.py
+---------------------
+Accuracy and speed check of INFERENCE_BACKEND="int8" against "float",
+on our own corpus and questions.
+
+Run with:
+    python -m src.evaluation.check_quantization
+    python -m src.evaluation.check_quantization --top-k 10 --json-out quant.json
+
+What it compares:
+    Embeddings  cosine similarity between the float and int8 vector of
+                every chunk (mean / p5 / min). Also the top-k retrieval
+                overlap when corpus and queries both use one backend.
+    Reranking   for each question, the float top-k chunks are scored by
+                both cross-encoders. Reports top-1 and top-3 agreement,
+                Spearman rank correlation, and the largest change in the
+                sigmoid confidence the evidence gate thresholds.
+    Speed       encode / predict time for each backend, with the same
+                thread settings (TORCH_NUM_THREADS) as the server.
+
+No LLM calls are made.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.embeddings.inference import get_embedding_model, get_cross_encoder, predict_bucketed
+from src.embeddings.query_cache import load_seed_questions
+from src.evaluation.evaluate_system import TEST_QUESTIONS, OUT_OF_SCOPE_QUESTIONS
+from src.config.settings import QUERY_CACHE_SEED_FILE
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _sigmoid(x):
+    """Same confidence mapping as rerank_chunks.sigmoid()."""
+    return 1 / (1 + np.exp(-x))
+
+
+def _spearman(a, b):
+    """Spearman rank correlation of two score lists (no tie correction)."""
+    if len(a) < 2:
+        return 1.0
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def compare_embeddings(documents, questions, top_k):
+    vectors, timings = {}, {}
+    query_vectors = {}
+
+    for backend in ("float", "int8"):
+        model = get_embedding_model(backend)
+        vectors[backend], timings[backend] = _timed(
+            model.encode, documents, batch_size=32, convert_to_numpy=True, normalize_embeddings=True
+        )
+        query_vectors[backend] = model.encode(questions, convert_to_numpy=True, normalize_embeddings=True)
+
+    cosines = (vectors["float"] * vectors["int8"]).sum(axis=1)
+
+    overlaps = []
+    for q_float, q_int8 in zip(query_vectors["float"], query_vectors["int8"]):
+        top_float = set(np.argsort(-(vectors["float"] @ q_float))[:top_k])
+        top_int8 = set(np.argsort(-(vectors["int8"] @ q_int8))[:top_k])
+        overlaps.append(len(top_float & top_int8) / top_k)
+
+    return {
+        "chunks": len(documents),
+        "cosine_mean": round(float(cosines.mean()), 4),
+        "cosine_p5": round(float(np.percentile(cosines, 5)), 4),
+        "cosine_min": round(float(cosines.min()), 4),
+        f"retrieval_overlap@{top_k}": round(float(np.mean(overlaps)), 4),
+        "encode_s": {backend: round(t, 2) for backend, t in timings.items()},
+        "speedup": round(timings["float"] / timings["int8"], 2)
+    }, vectors["float"], query_vectors["float"]
+
+
+def compare_reranking(documents, questions, doc_vectors, query_vectors, top_k):
+    encoders = {backend: get_cross_encoder(backend) for backend in ("float", "int8")}
+    timings = {"float": 0.0, "int8": 0.0}
+    top1, top3, spearman, confidence_delta = [], [], [], []
+
+    for question, query_vector in zip(questions, query_vectors):
+        candidates = np.argsort(-(doc_vectors @ query_vector))[:top_k]
+        pairs = [(question, documents[i]) for i in candidates]
+
+        scores = {}
+        for backend, encoder in encoders.items():
+            scores[backend], elapsed = _timed(predict_bucketed, encoder, pairs)
+            timings[backend] += elapsed
+
+        order_float = np.argsort(-scores["float"])
+        order_int8 = np.argsort(-scores["int8"])
+        top1.append(order_float[0] == order_int8[0])
+        top3.append(len(set(order_float[:3]) & set(order_int8[:3])) / min(3, len(pairs)))
+        spearman.append(_spearman(scores["float"], scores["int8"]))
+        confidence_delta.append(abs(_sigmoid(scores["float"].max()) - _sigmoid(scores["int8"].max())))
+
+    return {
+        "questions": len(questions),
+        "top1_agreement": round(float(np.mean(top1)), 4),
+        "top3_overlap": round(float(np.mean(top3)), 4),
+        "spearman_mean": round(float(np.mean(spearman)), 4),
+        "spearman_min": round(float(np.min(spearman)), 4),
+        "max_confidence_delta": round(float(np.max(confidence_delta)), 4),
+        "predict_s": {backend: round(t, 2) for backend, t in timings.items()},
+        "speedup": round(timings["float"] / timings["int8"], 2)
+    }
+
+
+def print_report(report):
+    print("\n==============================")
+    print("QUANTIZATION CHECK (int8 vs float)")
+    print("==============================\n")
+
+    for section in ("embeddings", "reranking"):
+        print(f"{section.capitalize()}:")
+        for key, value in report[section].items():
+            print(f"  {key:<26} {value}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare int8-quantized and float inference on our corpus.")
+    parser.add_argument("--top-k", type=int, default=10, help="Chunks compared per question.")
+    parser.add_argument("--json-out", default=None)
+    args = parser.parse_args()
+
+    from src.run_ingestion import run_ingestion
+    documents = run_ingestion().get(include=["documents"])["documents"]
+
+    questions = TEST_QUESTIONS + OUT_OF_SCOPE_QUESTIONS
+    try:
+        questions += load_seed_questions(QUERY_CACHE_SEED_FILE)
+    except FileNotFoundError:
+        pass
+
+    embeddings, doc_vectors, query_vectors = compare_embeddings(documents, questions, args.top_k)
+    reranking = compare_reranking(documents, questions, doc_vectors, query_vectors, args.top_k)
+    report = {"embeddings": embeddings, "reranking": reranking}
+
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Full report written to {args.json_out}")
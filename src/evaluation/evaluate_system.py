@@ -1,5 +1,7 @@
 import json
-from src.answering.answer_query import answer_query
+import argparse
+from src.answering.answer_query import answer_query, retrieve_evidence
+from src.answering.evidence_gate import evidence_is_weak
 
 
 # -----------------------------------------
@@ -14,6 +16,23 @@ TEST_QUESTIONS = [
 ]
 
 
+# -----------------------------------------
+# Out-of-scope Questions (gate calibration)
+# -----------------------------------------
+# Nothing in the policy answers these — the evidence gate should fire.
+OUT_OF_SCOPE_QUESTIONS = [
+    "What is the capital of France?",
+    "How do I bake sourdough bread?",
+    "Who won the 2018 FIFA World Cup?",
+    "What is on the cafeteria menu this week?",
+    "How do I configure Kubernetes pod autoscaling?"
+]
+
+# Threshold grid swept by --calibrate-gate
+RERANK_THRESHOLDS = [0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2]
+DENSE_THRESHOLDS = [0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35]
+
+
 def evaluate_answer(question, result):
     """
     Evaluate a single answer output.
@@ -67,7 +86,8 @@ def run_full_evaluation():
 
         print(f"Testing: {question}")
 
-        result = answer_query(question)
+        # Batch priority — evaluation runs yield the LLM budget to live users
+        result = answer_query(question, priority="batch", client_id="evaluate_system")
 
         evaluation = evaluate_answer(question, result)
 
@@ -84,5 +104,98 @@ def run_full_evaluation():
     print(json.dumps(results, indent=4))
 
 
+def collect_evidence_scores(questions):
+    """
+    Retrieval + rerank only — no LLM calls.
+    Returns one (rerank_score, dense_score) pair per question.
+    """
+
+    scores = []
+
+    for question in questions:
+        context = retrieve_evidence(question)
+
+        if context is None:
+            scores.append((0.0, 0.0))
+        else:
+            _, _, rerank_score, dense_score = context
+            scores.append((rerank_score, dense_score))
+
+    return scores
+
+
+def calibrate_evidence_gate():
+    """
+    Offline sweep of the evidence gate thresholds.
+
+    For every (rerank, dense) threshold pair, counts how often the gate
+    would skip an answerable question (false skip) and an out-of-scope
+    question (true skip), then recommends the most lenient pair that
+    catches the most out-of-scope questions with zero false skips.
+    """
+
+    print("\n==============================")
+    print("CALIBRATING EVIDENCE GATE")
+    print("==============================\n")
+
+    answerable = collect_evidence_scores(TEST_QUESTIONS)
+    out_of_scope = collect_evidence_scores(OUT_OF_SCOPE_QUESTIONS)
+
+    for label, questions, scores in (
+        ("answerable", TEST_QUESTIONS, answerable),
+        ("out-of-scope", OUT_OF_SCOPE_QUESTIONS, out_of_scope)
+    ):
+        for question, (rerank_score, dense_score) in zip(questions, scores):
+            print(f"[{label}] rerank={rerank_score:.4f} dense={dense_score:.3f}  {question}")
+
+    rows = []
+
+    for min_rerank in RERANK_THRESHOLDS:
+        for min_dense in DENSE_THRESHOLDS:
+            rows.append({
+                "min_rerank_score": min_rerank,
+                "min_dense_score": min_dense,
+                "false_skips": sum(evidence_is_weak(r, d, min_rerank, min_dense) for r, d in answerable),
+                "true_skips": sum(evidence_is_weak(r, d, min_rerank, min_dense) for r, d in out_of_scope)
+            })
+
+    print("\n==============================")
+    print("THRESHOLD SWEEP")
+    print("==============================\n")
+
+    print(f"{'min_rerank':>10} {'min_dense':>10} {'false_skips':>12} {'true_skips':>11}")
+    for row in rows:
+        print(
+            f"{row['min_rerank_score']:>10} {row['min_dense_score']:>10} "
+            f"{row['false_skips']:>12}/{len(answerable)} {row['true_skips']:>9}/{len(out_of_scope)}"
+        )
+
+    safe_rows = [row for row in rows if row["false_skips"] == 0]
+
+    if not safe_rows:
+        print("\nNo threshold pair avoids skipping answerable questions — keep the gate lenient.")
+        return rows
+
+    # Rows are generated from the lowest thresholds up, so max() keeps the most lenient tie
+    best = max(safe_rows, key=lambda row: row["true_skips"])
+
+    print("\nRecommended settings:")
+    print(f"EVIDENCE_MIN_RERANK_SCORE={best['min_rerank_score']}")
+    print(f"EVIDENCE_MIN_DENSE_SCORE={best['min_dense_score']}")
+
+    return rows
+
+
 if __name__ == "__main__":
-    run_full_evaluation()
+    parser = argparse.ArgumentParser(description="Evaluate the RAG system.")
+    parser.add_argument(
+        "--calibrate-gate",
+        action="store_true",
+        help="Sweep evidence gate thresholds offline (no LLM calls) instead of running the full evaluation."
+    )
+    args = parser.parse_args()
+
+    if args.calibrate_gate:
+        calibrate_evidence_gate()
+    else:
+        run_full_evaluation()
@@ -0,0 +1,174 @@
+"""
+fake_groq_server.py
+-------------------
+Local stand-in for Groq's OpenAI-compatible chat completions endpoint.
+
+Used by the load harness (load_test.py) so /ask can be driven at high RPS
+without spending Groq quota or tripping its rate limits. Point the app at
+it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+Behaviour is controlled by FakeLLMConfig:
+    latency_ms        — time before the first token (queueing + prefill)
+    tokens_per_sec    — decode speed after the first token
+    completion_tokens — length of every answer
+    error_rate        — fraction of requests answered with HTTP 429
+
+Both blocking and streaming (SSE) responses are supported, and every
+response carries x-ratelimit-* headers in Groq's format.
+
+Run standalone with:
+    python -m src.evaluation.fake_groq_server --port 8090 --latency-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 200.0
+    tokens_per_sec: float = 500.0
+    completion_tokens: int = 80
+    error_rate: float = 0.0
+
+
+ANSWER_WORDS = (
+    "According to the provided context, the policy requires that this "
+    "responsibility is assigned, documented and reviewed periodically."
+).split()
+
+
+def _ratelimit_headers():
+    return {
+        "x-ratelimit-limit-requests": "14400",
+        "x-ratelimit-remaining-requests": "14399",
+        "x-ratelimit-reset-requests": "6s",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "29000",
+        "x-ratelimit-reset-tokens": "2s",
+    }
+
+
+def create_fake_groq_app(config=None):
+    """Builds the fake server app for one FakeLLMConfig."""
+    config = config or FakeLLMConfig()
+    app = FastAPI(title="Fake Groq")
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+
+        if random.random() < config.error_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached (simulated)", "type": "tokens"}},
+                headers={**_ratelimit_headers(), "retry-after": "1"}
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake-model")
+        n_tokens = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+        words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(n_tokens)]
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": n_tokens,
+            "total_tokens": prompt_tokens + n_tokens
+        }
+
+        await asyncio.sleep(config.latency_ms / 1000)
+
+        if not body.get("stream"):
+            await asyncio.sleep(n_tokens / config.tokens_per_sec)
+            return JSONResponse(
+                content={
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": " ".join(words)},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                },
+                headers=_ratelimit_headers()
+            )
+
+        async def events():
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if i == 0 else " " + word},
+                        "finish_reason": None
+                    }]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(1 / config.tokens_per_sec)
+
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage}
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=_ratelimit_headers())
+
+    return app
+
+
+def start_server_in_thread(app, port, host="127.0.0.1"):
+    """
+    Serves an ASGI app with uvicorn on a daemon thread.
+    Returns the uvicorn.Server; set `server.should_exit = True` to stop it.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Server on port {port} failed to start.")
+        time.sleep(0.05)
+
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Groq-compatible stand-in.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--completion-tokens", type=int, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake_config = FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate
+    )
+    uvicorn.run(create_fake_groq_app(fake_config), host="127.0.0.1", port=args.port)
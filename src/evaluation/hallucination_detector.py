@@ -1,9 +1,10 @@
-from sentence_transformers import SentenceTransformer, util
-import torch
+from sentence_transformers import util
+from src.embeddings.inference import get_embedding_model
 
 
-# Lightweight embedding model for semantic comparison
-grounding_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Lightweight embedding model for semantic comparison — the same shared
+# instance (and backend) that embeds queries
+grounding_model = get_embedding_model()
 
 
 def detect_hallucination(answer, context_chunks, threshold=0.65):
@@ -0,0 +1,300 @@
+"""
+load_test.py
+------------
+Self-contained end-to-end load harness for the /ask API.
+
+Run with:
+    python -m src.evaluation.load_test --concurrency 8 --requests 200
+    python -m src.evaluation.load_test --rps 5 --duration 60 --llm-latency-ms 400
+
+What it does:
+    1. Starts the local Groq stand-in (fake_groq_server.py) on a free port
+       with the requested latency / token rate, and points GROQ_BASE_URL
+       at it — no Groq quota is used.
+    2. Starts the real FastAPI app in-process with uvicorn (startup
+       ingestion included), on another free port.
+    3. Drives it with an asyncio httpx client, either
+         closed loop — --concurrency workers, --requests in total, or
+         open loop   — a fixed --rps for --duration seconds.
+    4. Reports throughput, latency percentiles, error / shed rates and
+       the server-side stage breakdown from each response's "timings_ms".
+
+Shed = the server refused work (HTTP 429/503, or a "shed" event on
+/ask/stream, whose 200 status is already sent by then). Dropped = in open-loop
+mode, the client skipped a send because --max-in-flight requests were
+already outstanding (the server is not keeping up with the target RPS).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import time
+
+import httpx
+
+from src.evaluation.fake_groq_server import FakeLLMConfig, create_fake_groq_app, start_server_in_thread
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def _send(client, endpoint, question, records):
+    """Sends one question and appends a result record."""
+    record = {
+        "status": None, "latency_ms": None, "ttft_ms": None, "llm_queue_ms": None,
+        "error": None, "shed": False, "timings_ms": {}
+    }
+    start = time.perf_counter()
+
+    try:
+        if endpoint == "/ask/stream":
+            async with client.stream("POST", endpoint, json={"question": question}) as response:
+                record["status"] = response.status_code
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["type"] == "token" and record["ttft_ms"] is None:
+                        record["ttft_ms"] = (time.perf_counter() - start) * 1000
+                    elif event["type"] == "result":
+                        record["timings_ms"] = event["result"].get("timings_ms") or {}
+                        record["llm_queue_ms"] = event["result"].get("llm_queue_ms")
+                    elif event["type"] == "shed":
+                        record["shed"] = True
+                    elif event["type"] == "error":
+                        record["error"] = event["error"]
+        else:
+            response = await client.post(endpoint, json={"question": question})
+            record["status"] = response.status_code
+            if response.status_code == 200:
+                body = response.json()
+                # /ask reports pipeline failures in the body with HTTP 200
+                if "error" in body:
+                    record["error"] = body["error"]
+                else:
+                    record["timings_ms"] = body.get("timings_ms") or {}
+                    record["llm_queue_ms"] = body.get("llm_queue_ms")
+    except httpx.HTTPError as e:
+        record["error"] = str(e) or type(e).__name__
+
+    record["latency_ms"] = (time.perf_counter() - start) * 1000
+    records.append(record)
+
+
+async def run_closed_loop(client, endpoint, questions, concurrency, total, records):
+    """`concurrency` workers send back-to-back until `total` requests are done."""
+    indices = iter(range(total))
+
+    async def worker():
+        for i in indices:
+            await _send(client, endpoint, questions[i % len(questions)], records)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return 0
+
+
+async def run_open_loop(client, endpoint, questions, rps, duration, max_in_flight, records):
+    """
+    Sends at a fixed rate regardless of response times, like real traffic.
+    Returns how many sends were dropped because max_in_flight was reached.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = set()
+    dropped = 0
+
+    for i in range(int(rps * duration)):
+        await asyncio.sleep(max(0.0, start + i / rps - loop.time()))
+
+        if len(tasks) >= max_in_flight:
+            dropped += 1
+            continue
+
+        task = asyncio.create_task(_send(client, endpoint, questions[i % len(questions)], records))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return dropped
+
+
+def build_report(records, dropped, elapsed_s):
+    """Aggregates per-request records into the load test report."""
+    ok, shed, errors = [], [], []
+    for r in records:
+        if r["shed"] or r["status"] in (429, 503):
+            shed.append(r)
+        elif r["status"] == 200 and r["error"] is None:
+            ok.append(r)
+        else:
+            errors.append(r)
+
+    attempted = len(records) + dropped
+    latencies = [r["latency_ms"] for r in ok]
+
+    stages = {}
+    for r in ok:
+        for stage, ms in r["timings_ms"].items():
+            stages.setdefault(stage, []).append(ms)
+
+    # Whatever the pipeline stages don't account for: HTTP, thread-pool
+    # queueing, (de)serialization
+    overhead = [r["latency_ms"] - sum(r["timings_ms"].values()) for r in ok if r["timings_ms"]]
+    if overhead:
+        stages["unaccounted (queue + http)"] = overhead
+
+    def summary(values):
+        return {
+            "p50": round(percentile(values, 50), 1),
+            "p90": round(percentile(values, 90), 1),
+            "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1),
+            "max": round(max(values), 1),
+            "mean": round(sum(values) / len(values), 1)
+        } if values else None
+
+    ttfts = [r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]
+    llm_queue = [r["llm_queue_ms"] for r in ok if r["llm_queue_ms"] is not None]
+
+    return {
+        "attempted": attempted,
+        "completed_ok": len(ok),
+        "errors": len(errors),
+        "shed": len(shed),
+        "dropped": dropped,
+        "error_rate": round(len(errors) / attempted, 4) if attempted else 0.0,
+        "shed_rate": round((len(shed) + dropped) / attempted, 4) if attempted else 0.0,
+        "duration_s": round(elapsed_s, 2),
+        "throughput_rps": round(len(ok) / elapsed_s, 2) if elapsed_s else 0.0,
+        "latency_ms": summary(latencies),
+        "ttft_ms": summary(ttfts),
+        "llm_queue_ms": summary(llm_queue),
+        "stages_ms": {stage: summary(values) for stage, values in sorted(stages.items())},
+        "sample_errors": sorted({r["error"] or f"HTTP {r['status']}" for r in errors})[:5]
+    }
+
+
+def print_report(report):
+    print("\n==============================")
+    print("LOAD TEST REPORT")
+    print("==============================\n")
+
+    print(f"Attempted:    {report['attempted']}")
+    print(f"OK:           {report['completed_ok']}")
+    print(f"Errors:       {report['errors']} ({report['error_rate']:.1%})")
+    print(f"Shed/dropped: {report['shed']} / {report['dropped']} ({report['shed_rate']:.1%})")
+    print(f"Duration:     {report['duration_s']} s")
+    print(f"Throughput:   {report['throughput_rps']} req/s")
+
+    for label, key in (("Latency", "latency_ms"), ("Time to first token", "ttft_ms"),
+                       ("LLM rate-limit queue", "llm_queue_ms")):
+        if report[key]:
+            s = report[key]
+            print(f"\n{label} (ms): p50 {s['p50']}  p90 {s['p90']}  p95 {s['p95']}  p99 {s['p99']}  max {s['max']}")
+
+    if report["stages_ms"]:
+        print("\nServer-side stages (ms):")
+        print(f"  {'stage':<28} {'mean':>8} {'p50':>8} {'p95':>8}")
+        for stage, s in report["stages_ms"].items():
+            print(f"  {stage:<28} {s['mean']:>8} {s['p50']:>8} {s['p95']:>8}")
+
+    for error in report["sample_errors"]:
+        print(f"\nSample error: {error}")
+
+
+async def drive(base_url, args, questions):
+    limit = args.concurrency if args.rps is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+    records = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        if args.rps is None:
+            dropped = await run_closed_loop(client, args.endpoint, questions, args.concurrency, args.requests, records)
+        else:
+            dropped = await run_open_loop(
+                client, args.endpoint, questions, args.rps, args.duration, args.max_in_flight, records
+            )
+        elapsed = time.perf_counter() - start
+
+        report = build_report(records, dropped, elapsed)
+        report["server_metrics"] = (await client.get("/metrics")).json()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of /ask against a local Groq stand-in.")
+    parser.add_argument("--endpoint", choices=["/ask", "/ask/stream"], default="/ask")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: parallel workers.")
+    parser.add_argument("--requests", type=int, default=200, help="Closed loop: total requests.")
+    parser.add_argument("--rps", type=float, default=None, help="Open loop: target requests/sec (overrides closed loop).")
+    parser.add_argument("--duration", type=float, default=60.0, help="Open loop: seconds to run.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: outstanding request cap.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (s).")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--llm-completion-tokens", type=int, default=80)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rpm-limit", type=int, default=1_000_000,
+                        help="Client-side scheduler RPM budget (default: effectively unlimited).")
+    parser.add_argument("--llm-tpm-limit", type=int, default=100_000_000,
+                        help="Client-side scheduler TPM budget (default: effectively unlimited).")
+    parser.add_argument("--json-out", default=None, help="Also write the full report to this file.")
+    args = parser.parse_args()
+
+    # The Groq client reads these at import time — set them before importing the app
+    llm_port = _free_port()
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{llm_port}"
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    # Pace against the stand-in's capacity, not the real Groq key's limits
+    os.environ["GROQ_RPM_LIMIT"] = str(args.llm_rpm_limit)
+    os.environ["GROQ_TPM_LIMIT"] = str(args.llm_tpm_limit)
+
+    llm_config = FakeLLMConfig(
+        latency_ms=args.llm_latency_ms,
+        tokens_per_sec=args.llm_tokens_per_sec,
+        completion_tokens=args.llm_completion_tokens,
+        error_rate=args.llm_error_rate
+    )
+    llm_server = start_server_in_thread(create_fake_groq_app(llm_config), llm_port)
+    print(f"Fake Groq listening on {os.environ['GROQ_BASE_URL']}")
+
+    from src.api.app import app
+    from src.evaluation.evaluate_system import TEST_QUESTIONS, OUT_OF_SCOPE_QUESTIONS
+
+    api_port = _free_port()
+    print("Starting API (startup ingestion runs first)...")
+    api_server = start_server_in_thread(app, api_port)
+
+    try:
+        report = asyncio.run(drive(f"http://127.0.0.1:{api_port}", args, TEST_QUESTIONS + OUT_OF_SCOPE_QUESTIONS))
+    finally:
+        api_server.should_exit = True
+        llm_server.should_exit = True
+
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nFull report written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+memory_soak.py
+--------------
+Memory leak regression harness: runs the query pipeline N times in-process
+and fails if RSS keeps growing after warm-up.
+
+Run with:
+    python -m src.evaluation.memory_soak --requests 2000 --max-growth-mb 40
+
+Stages:
+    retrieval (default) — retrieval + rerank only (retrieve_evidence()).
+                          This is where models and caches live, and it
+                          makes no Groq calls, so it is free to run often.
+    full                — complete answer_query() including the LLM call.
+
+Why measure after warm-up?
+    The first requests legitimately allocate: model weights are paged in,
+    the query cache fills, torch grows its allocator pools. A leak is
+    memory that KEEPS growing once that has settled, so the baseline is
+    taken after --warmup requests and a gc.collect().
+
+Exit status is 1 when growth exceeds --max-growth-mb, so this can gate CI.
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from src.answering.answer_query import answer_query, retrieve_evidence
+from src.evaluation.evaluate_system import TEST_QUESTIONS, OUT_OF_SCOPE_QUESTIONS
+from src.utils.memory_profiler import current_rss_bytes
+
+
+def _mb(n_bytes):
+    return n_bytes / (1024 * 1024)
+
+
+def _question(i, unique):
+    """Cycles through the known questions; `unique` defeats the query cache."""
+    questions = TEST_QUESTIONS + OUT_OF_SCOPE_QUESTIONS
+    question = questions[i % len(questions)]
+    return f"{question} (variant {i})" if unique else question
+
+
+def _slope_kb_per_request(samples):
+    """Least-squares slope of (request index, RSS) samples, in KB per request."""
+    if len(samples) < 2:
+        return 0.0
+
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in samples)
+    variance = sum((x - mean_x) ** 2 for x, _ in samples)
+
+    return covariance / variance / 1024 if variance else 0.0
+
+
+def run_soak(requests=1000, warmup=50, max_growth_mb=50.0, sample_every=50,
+             stage="retrieval", unique_queries=False, trace=False):
+    """
+    Runs the soak test and prints a report.
+
+    Returns:
+        True if RSS growth after warm-up stayed within max_growth_mb.
+    """
+    run_one = answer_query if stage == "full" else retrieve_evidence
+
+    print("\n==============================")
+    print(f"MEMORY SOAK ({stage}): {warmup} warm-up + {requests} measured requests")
+    print("==============================\n")
+
+    for i in range(warmup):
+        run_one(_question(i, unique_queries))
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+
+    baseline = current_rss_bytes()
+    samples = [(0, baseline)]
+    print(f"Baseline RSS after warm-up: {_mb(baseline):.1f} MB")
+
+    start = time.perf_counter()
+
+    for i in range(1, requests + 1):
+        run_one(_question(warmup + i, unique_queries))
+
+        if i % sample_every == 0 or i == requests:
+            rss = current_rss_bytes()
+            samples.append((i, rss))
+            print(f"  request {i:>6}: RSS {_mb(rss):.1f} MB ({_mb(rss - baseline):+.1f} MB)")
+
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    final = current_rss_bytes()
+    growth_mb = _mb(final - baseline)
+    peak_mb = _mb(max(rss for _, rss in samples) - baseline)
+
+    print("\n==============================")
+    print("SOAK SUMMARY")
+    print("==============================\n")
+    print(f"Requests/sec:        {requests / elapsed:.1f}")
+    print(f"RSS growth (final):  {growth_mb:+.1f} MB")
+    print(f"RSS growth (peak):   {peak_mb:+.1f} MB")
+    print(f"Trend:               {_slope_kb_per_request(samples):+.2f} KB/request")
+    print(f"Bound:               {max_growth_mb:.1f} MB")
+
+    if trace:
+        diff = tracemalloc.take_snapshot().compare_to(snapshot_before, "lineno")
+        print("\nTop Python allocation growth since baseline:")
+        for stat in diff[:10]:
+            frame = stat.traceback[0]
+            print(f"  {frame.filename}:{frame.lineno}  {stat.size_diff / 1024:+.1f} KB ({stat.count_diff:+} blocks)")
+        tracemalloc.stop()
+
+    passed = growth_mb <= max_growth_mb
+    print("\nPASS" if passed else "\nFAIL: memory grew beyond the bound")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if memory grows beyond a bound over N requests.")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests after warm-up.")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests before the baseline is taken.")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0, help="Allowed RSS growth after warm-up.")
+    parser.add_argument("--sample-every", type=int, default=50, help="Print an RSS sample every N requests.")
+    parser.add_argument("--stage", choices=["retrieval", "full"], default="retrieval",
+                        help="'full' includes the Groq call and uses real quota.")
+    parser.add_argument("--unique-queries", action="store_true",
+                        help="Make every question unique so the query cache keeps missing "
+                             "(expect up to QUERY_CACHE_MAX_BYTES of legitimate growth).")
+    parser.add_argument("--trace", action="store_true",
+                        help="Report the top tracemalloc growth sites (slows the run).")
+    args = parser.parse_args()
+
+    ok = run_soak(
+        requests=args.requests,
+        warmup=args.warmup,
+        max_growth_mb=args.max_growth_mb,
+        sample_every=args.sample_every,
+        stage=args.stage,
+        unique_queries=args.unique_queries,
+        trace=args.trace
+    )
+    sys.exit(0 if ok else 1)
@@ -13,25 +13,17 @@ Pipeline position:
     retrieve_chunks → rerank_chunks → [this file] → hallucination_detector
 """
 
-from src.llm.groq_client import get_groq_client, GROQ_MODEL
+from src.llm.scheduler import scheduled_completion, scheduled_stream
 
 
-def generate_grounded_answer(query: str, retrieved_chunks: list) -> str:
+def build_grounded_messages(query: str, retrieved_chunks: list) -> list:
     """
-    Given a user query and a list of retrieved text chunks,
-    generates a grounded answer using Groq.
-
-    Args:
-        query           : The user's question as plain text.
-        retrieved_chunks: List of strings — the top-k retrieved chunks
-                          from ChromaDB after retrieval and reranking.
+    Builds the chat messages for a grounded answer.
 
-    Returns:
-        A plain text answer string from the LLM.
+    Shared by the blocking and streaming paths so both send the exact same
+    prompt to the model.
     """
 
-    client = get_groq_client()
-
     # Combine all retrieved chunks into one context block.
     # We use a clear separator (---) between chunks so the model
     # understands these are distinct sections of the source document,
@@ -54,22 +46,71 @@ Question:
 
 Answer:"""
 
-    response = client.chat.completions.create(
-        model=GROQ_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are a strict, grounded policy assistant. "
-                    "Answer only from the provided context. Never invent information."
-                )
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a strict, grounded policy assistant. "
+                "Answer only from the provided context. Never invent information."
+            )
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+def generate_grounded_answer(query: str, retrieved_chunks: list, priority: str = "interactive",
+                             client_id: str = None, timings: dict = None) -> str:
+    """
+    Given a user query and a list of retrieved text chunks,
+    generates a grounded answer using Groq.
+
+    Args:
+        query           : The user's question as plain text.
+        retrieved_chunks: List of strings — the top-k retrieved chunks
+                          from ChromaDB after retrieval and reranking.
+        priority        : "interactive" or "batch" — see src/llm/scheduler.py.
+        client_id       : Caller identity for fair queuing between clients.
+        timings         : Optional dict; the rate-limit queue wait (ms) is
+                          stored under "llm_queue".
+
+    Returns:
+        A plain text answer string from the LLM.
+    """
+
+    response = scheduled_completion(
+        build_grounded_messages(query, retrieved_chunks),
+        priority=priority,
+        client_id=client_id,
+        timings=timings,
         temperature=0,  # 0 = fully deterministic — no creativity, only facts
     )
 
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    return response.choices[0].message.content.strip()
+
+
+def stream_grounded_answer(query: str, retrieved_chunks: list, priority: str = "interactive",
+                           client_id: str = None, timings: dict = None):
+    """
+    Streaming variant of generate_grounded_answer().
+
+    Yields the answer as text fragments in the order Groq produces them,
+    so callers can forward tokens to the client before generation finishes.
+    """
+
+    stream = scheduled_stream(
+        build_grounded_messages(query, retrieved_chunks),
+        priority=priority,
+        client_id=client_id,
+        timings=timings,
+        temperature=0,
+    )
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
@@ -0,0 +1,298 @@
+"""
+extraction_cache.py
+-------------------
+Persistent cache of pypdf page text, so re-ingesting a PDF does not
+re-run extract_text() on pages that have not changed.
+
+Place this file at: src/ingestion/extraction_cache.py
+
+Why?
+    extract_text() is by far the slowest CPU step of ingestion, and it
+    produces the same text every time for the same page bytes.
+
+How pages are keyed:
+    file_pages  (file_hash, page_index, extractor) → page_digest
+    page_texts  (page_digest, extractor)           → zlib-compressed text
+
+    - file_hash is the SHA-256 of the whole PDF. An unchanged file is a
+      single lookup, and pypdf never even opens it.
+    - page_digest hashes one page's content stream plus its whole
+      resource dictionary, recursively: fonts with their encodings,
+      differences and widths, and form XObjects with their own content
+      streams and resources. When a PDF is appended to or edited, its
+      file_hash changes but untouched pages keep their digest. Only new
+      or changed pages are extracted again.
+    - extractor includes the pypdf version, so upgrading pypdf (or bumping
+      EXTRACTOR_REVISION after changing how text is extracted) invalidates
+      old entries instead of serving stale text.
+
+Storage is one SQLite file (PDF_CACHE_PATH) — a single compact file,
+safe to delete at any time. It runs in WAL mode with a busy timeout, so
+concurrent ingestion workers wait for each other instead of failing
+with "database is locked".
+
+CLI:
+    python -m src.ingestion.extraction_cache warm  data/raw_pdfs/*.pdf
+    python -m src.ingestion.extraction_cache inspect [PDF ...]
+    python -m src.ingestion.extraction_cache clear
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+
+import pypdf
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+from src.config.settings import PDF_CACHE_PATH
+
+
+# Bump when the extraction logic itself changes
+EXTRACTOR_REVISION = 1
+EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}/r{EXTRACTOR_REVISION}"
+
+# Seconds a connection waits for another writer before "database is locked"
+_BUSY_TIMEOUT_S = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_pages (
+    file_hash   TEXT NOT NULL,
+    page_index  INTEGER NOT NULL,
+    extractor   TEXT NOT NULL,
+    page_digest TEXT NOT NULL,
+    PRIMARY KEY (file_hash, page_index, extractor)
+);
+CREATE TABLE IF NOT EXISTS page_texts (
+    page_digest TEXT NOT NULL,
+    extractor   TEXT NOT NULL,
+    text        BLOB NOT NULL,
+    PRIMARY KEY (page_digest, extractor)
+);
+"""
+
+
+def _connect(path=PDF_CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_S)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def file_hash(pdf_path):
+    """SHA-256 of the file contents, streamed in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_object(obj, digest, seen):
+    """
+    Feeds a PDF object into `digest`, following references. Streams
+    contribute their raw (still encoded) bytes, so images are not decoded
+    just to be hashed. Objects already visited are hashed as a back
+    reference, which also stops reference cycles.
+    """
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key in seen:
+            digest.update(f"\0ref{seen[key]}".encode())
+            return
+        seen[key] = len(seen)
+        obj = obj.get_object()
+
+    if isinstance(obj, DictionaryObject):
+        digest.update(b"\0<<")
+        for name in sorted(obj):
+            digest.update(f"\0{name}".encode())
+            # dict.__getitem__ skips pypdf's auto-resolving, keeping references
+            _hash_object(dict.__getitem__(obj, name), digest, seen)
+        digest.update(b"\0>>")
+        if isinstance(obj, StreamObject):
+            data = getattr(obj, "_data", None)
+            digest.update(data if isinstance(data, bytes) else obj.get_data())
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"\0[")
+        for item in list.__iter__(obj):
+            _hash_object(item, digest, seen)
+        digest.update(b"\0]")
+    else:
+        digest.update(f"\0{type(obj).__name__}:{obj}".encode())
+
+
+def page_digest(page):
+    """
+    Digest of everything extract_text() reads for one page: the content
+    stream, the rotation, and the whole resource dictionary (fonts and
+    their encodings, widths and ToUnicode maps; form XObjects and their
+    nested resources).
+    """
+    digest = hashlib.sha256()
+
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+
+    digest.update(f"\0rotate:{page.get('/Rotate', 0)}".encode())
+
+    resources = page.get("/Resources")
+    if resources is not None:
+        _hash_object(resources, digest, {})
+
+    return digest.hexdigest()
+
+
+def _compress(text):
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def extract_pages(pdf_path, cache_path=PDF_CACHE_PATH):
+    """
+    Returns the extracted text of every page, using the cache where possible.
+
+    Returns:
+        (texts, stats) — texts[i] is page i's text ("" for empty pages);
+        stats counts {"pages", "cached", "extracted"}.
+    """
+    key = file_hash(pdf_path)
+
+    with closing(_connect(cache_path)) as conn:
+        rows = conn.execute(
+            "SELECT fp.page_index, pt.text FROM file_pages fp "
+            "JOIN page_texts pt ON pt.page_digest = fp.page_digest AND pt.extractor = fp.extractor "
+            "WHERE fp.file_hash = ? AND fp.extractor = ? ORDER BY fp.page_index",
+            (key, EXTRACTOR_VERSION)
+        ).fetchall()
+
+        # Unchanged file — served entirely from the cache without opening it
+        if rows and [index for index, _ in rows] == list(range(len(rows))):
+            texts = [_decompress(blob) for _, blob in rows]
+            return texts, {"pages": len(texts), "cached": len(texts), "extracted": 0}
+
+        reader = PdfReader(pdf_path)
+        texts = []
+        cached = 0
+
+        for page_index, page in enumerate(reader.pages):
+            digest = page_digest(page)
+            row = conn.execute(
+                "SELECT text FROM page_texts WHERE page_digest = ? AND extractor = ?",
+                (digest, EXTRACTOR_VERSION)
+            ).fetchone()
+
+            if row is not None:
+                text = _decompress(row[0])
+                cached += 1
+            else:
+                text = page.extract_text() or ""
+                conn.execute(
+                    "INSERT OR REPLACE INTO page_texts VALUES (?, ?, ?)",
+                    (digest, EXTRACTOR_VERSION, _compress(text))
+                )
+
+            conn.execute(
+                "INSERT OR REPLACE INTO file_pages VALUES (?, ?, ?, ?)",
+                (key, page_index, EXTRACTOR_VERSION, digest)
+            )
+            texts.append(text)
+
+        conn.commit()
+
+    return texts, {"pages": len(texts), "cached": cached, "extracted": len(texts) - cached}
+
+
+def inspect_cache(pdf_paths=(), cache_path=PDF_CACHE_PATH):
+    """Summary of the cache, plus per-file coverage for any PDFs given."""
+    if not os.path.exists(cache_path):
+        return {"path": cache_path, "exists": False}
+
+    with closing(_connect(cache_path)) as conn:
+        summary = {
+            "path": cache_path,
+            "exists": True,
+            "size_bytes": os.path.getsize(cache_path),
+            "extractor": EXTRACTOR_VERSION,
+            "files": conn.execute("SELECT COUNT(DISTINCT file_hash) FROM file_pages").fetchone()[0],
+            "pages": conn.execute("SELECT COUNT(*) FROM page_texts").fetchone()[0],
+            "compressed_text_bytes": conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(text)), 0) FROM page_texts"
+            ).fetchone()[0],
+            "stale_pages": conn.execute(
+                "SELECT COUNT(*) FROM page_texts WHERE extractor != ?", (EXTRACTOR_VERSION,)
+            ).fetchone()[0],
+        }
+
+        summary["pdfs"] = {
+            pdf_path: conn.execute(
+                "SELECT COUNT(*) FROM file_pages WHERE file_hash = ? AND extractor = ?",
+                (file_hash(pdf_path), EXTRACTOR_VERSION)
+            ).fetchone()[0]
+            for pdf_path in pdf_paths
+        }
+
+    return summary
+
+
+def clear_cache(cache_path=PDF_CACHE_PATH):
+    """
+    Empties the cache through a connection rather than deleting the file:
+    in WAL mode committed pages may still sit in the -wal file, and another
+    process may have the database open. Rows are deleted, the file shrunk
+    with VACUUM, and the WAL checkpointed and truncated.
+    """
+    if not os.path.exists(cache_path):
+        return
+    with closing(_connect(cache_path)) as conn:
+        with conn:
+            conn.execute("DELETE FROM file_pages")
+            conn.execute("DELETE FROM page_texts")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm and inspect the PDF page-extraction cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    warm = commands.add_parser("warm", help="Extract and cache every page of the given PDFs.")
+    warm.add_argument("pdfs", nargs="+")
+
+    inspect = commands.add_parser("inspect", help="Show cache size and per-PDF coverage.")
+    inspect.add_argument("pdfs", nargs="*")
+
+    commands.add_parser("clear", help="Delete every cached page.")
+
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        for path in args.pdfs:
+            _, stats = extract_pages(path)
+            print(f"{path}: {stats['pages']} pages ({stats['cached']} cached, {stats['extracted']} extracted)")
+
+    elif args.command == "inspect":
+        summary = inspect_cache(args.pdfs)
+        if not summary["exists"]:
+            print(f"No cache at {summary['path']}")
+        else:
+            print(f"Cache:          {summary['path']}")
+            print(f"Size:           {summary['size_bytes'] / 1024:.1f} KB "
+                  f"({summary['compressed_text_bytes'] / 1024:.1f} KB compressed text)")
+            print(f"Extractor:      {summary['extractor']}")
+            print(f"Files:          {summary['files']}")
+            print(f"Distinct pages: {summary['pages']} ({summary['stale_pages']} from older extractors)")
+            for path, pages in summary["pdfs"].items():
+                print(f"  {path}: {pages} pages cached" if pages else f"  {path}: not cached")
+
+    elif args.command == "clear":
+        clear_cache()
+        print(f"Cleared {PDF_CACHE_PATH}")
@@ -1,16 +1,26 @@
 from pypdf import PdfReader
 from pathlib import Path
+from src.config.settings import PDF_CACHE_ENABLED
+from src.ingestion.extraction_cache import extract_pages
 
-def load_pdf(pdf_path: str) -> list[dict]:
+def load_pdf(pdf_path: str, use_cache: bool = PDF_CACHE_ENABLED) -> list[dict]:
     """load a pdf and return a list of documents with text and metadata
        Each document corresponds to one page
+
+       With use_cache, page text comes from the extraction cache
+       (see extraction_cache.py) and only new or changed pages are extracted.
     """
 
-    reader = PdfReader(pdf_path)
+    if use_cache:
+        page_texts, stats = extract_pages(pdf_path)
+        print(f"Extraction cache: {stats['cached']}/{stats['pages']} pages reused, {stats['extracted']} extracted")
+    else:
+        reader = PdfReader(pdf_path)
+        page_texts = (page.extract_text() for page in reader.pages)
+
     documents = []
 
-    for page_number, page in enumerate(reader.pages):
-        text = page.extract_text()
+    for page_number, text in enumerate(page_texts):
 
         if text:
             documents.append({
@@ -23,6 +23,10 @@ load_dotenv()
 # ---- Change this one line to switch models across the entire project ----
 GROQ_MODEL = "llama-3.1-8b-instant"
 
+# Optional endpoint override, e.g. the local stand-in used by the load
+# harness (src/evaluation/fake_groq_server.py). Unset = api.groq.com.
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+
 
 def get_groq_client():
     """
@@ -38,4 +42,9 @@ def get_groq_client():
             "environment variable on Render / Streamlit Cloud."
         )
 
-    return Groq(api_key=api_key)
\ No newline at end of file
+    # max_retries=0: src/llm/scheduler.py retries through its rate-limit
+    # buckets; SDK retries would resend 429s without waiting for budget
+    if GROQ_BASE_URL:
+        return Groq(api_key=api_key, base_url=GROQ_BASE_URL, max_retries=0)
+
+    return Groq(api_key=api_key, max_retries=0)
\ No newline at end of file
@@ -0,0 +1,385 @@
+"""
+scheduler.py
+------------
+Client-side rate-limit scheduler for Groq chat completions.
+
+Place this file at: src/llm/scheduler.py
+
+Why?
+    Groq enforces requests-per-minute and tokens-per-minute limits per
+    API key. Without local pacing, a burst of /ask calls (or one
+    evaluate_system.py run) fires everything at once, and the overflow
+    comes back as 429s, and the SDK's own retries would resend them
+    blind, outside any budget. Batch evaluation also competes on equal terms
+    with the users waiting on an answer.
+
+How it works:
+    - Two token buckets, RPM and TPM, refill continuously at limit / 60
+      per second. A request needs 1 request token and its estimated
+      prompt + completion tokens (characters / 4, plus max_tokens or
+      LLM_COMPLETION_TOKEN_ESTIMATE).
+    - Waiting requests sit in one priority queue ordered by
+        (priority, virtual finish time, arrival)
+      "interactive" always goes before "batch". Within a priority, each
+      client_id gets a virtual clock (start-time fair queuing weighted by
+      estimated tokens), so one client submitting 50 questions cannot
+      lock out another that submits one.
+    - Only the head of the queue may take tokens. It waits until both
+      buckets can cover it.
+    - After each call, the x-ratelimit-remaining-* / reset-* headers pull
+      the local buckets down to what Groq reports (never up), and the
+      token estimate is replaced by the actual usage.
+    - The Groq client is built with max_retries=0; retries happen here.
+      A 429 blocks both buckets until Groq's retry-after and the request
+      queues again. Connection errors and 5xx return the attempt's
+      budget, back off exponentially, then queue again. Up to LLM_MAX_RETRIES retries, all inside the same
+      queue timeout / deadline.
+
+Each call records how long it waited in the queue under "llm_queue" in
+the `timings` dict it is given; answer_query returns it per request as
+"llm_queue_ms".
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+
+from groq import APIConnectionError, APIStatusError, APITimeoutError
+
+from src.llm.groq_client import get_groq_client, GROQ_MODEL
+from src.config.settings import (
+    GROQ_RPM_LIMIT,
+    GROQ_TPM_LIMIT,
+    LLM_COMPLETION_TOKEN_ESTIMATE,
+    LLM_QUEUE_TIMEOUT_S,
+    LLM_MAX_RETRIES
+)
+
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+_PRIORITY_NAMES = {rank: name for name, rank in PRIORITIES.items()}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class LLMQueueTimeout(RuntimeError):
+    """Raised when a request waits longer than its allowed queue time."""
+
+
+def parse_reset(value):
+    """Groq reset header ("2m59.56s", "7.66s", "120ms") → seconds."""
+    if not value:
+        return 0.0
+    return sum(float(n) * _DURATION_SECONDS[unit] for n, unit in _DURATION_PART.findall(value))
+
+
+def estimate_text_tokens(text):
+    """~4 characters per token — close enough for Llama tokenizers on English."""
+    return len(text) // 4
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Prompt tokens (plus a few per message for the chat template) and the expected completion."""
+    prompt = sum(estimate_text_tokens(m["content"]) + 4 for m in messages)
+    return prompt + (max_tokens or LLM_COMPLETION_TOKEN_ESTIMATE)
+
+
+class TokenBucket:
+    """Continuously refilling bucket. Levels may go negative (debt) after reconciliation."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` can be taken (0 if it can be taken now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        shortfall = max(0.0, (amount - self.level) / self.rate)
+        return max(shortfall, self.blocked_until - now)
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta):
+        self.level = min(self.capacity, self.level + delta)
+
+    def sync(self, remaining, reset_s, now):
+        """Never trust more than the server says is left."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+        if remaining <= 0:
+            self.blocked_until = max(self.blocked_until, now + reset_s)
+
+
+class LLMScheduler:
+    """Priority + fair-queued admission against RPM/TPM token buckets."""
+
+    def __init__(self, rpm=GROQ_RPM_LIMIT, tpm=GROQ_TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._condition = threading.Condition()
+        self._queue = []                     # heap of (priority, finish, seq)
+        self._arrivals = itertools.count()
+        self._virtual_time = 0.0
+        self._client_finish = {}             # (rank, client_id) → last virtual finish
+        self._stats = {
+            "dispatched": {name: 0 for name in PRIORITIES},
+            "timeouts": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "header_syncs": 0,
+            "queue_wait_ms_total": {name: 0.0 for name in PRIORITIES}
+        }
+
+    # ── Admission ─────────────────────────────────────────────────────────────
+
+    def acquire(self, estimated_tokens, priority="interactive", client_id=None, max_wait_s=LLM_QUEUE_TIMEOUT_S):
+        """
+        Blocks until this request may be sent. Returns the queue wait in ms.
+        Raises LLMQueueTimeout if it waits longer than max_wait_s.
+        """
+        rank = PRIORITIES[priority]
+        arrived = time.monotonic()
+
+        with self._condition:
+            start = max(self._virtual_time, self._client_finish.get((rank, client_id), 0.0))
+            finish = start + estimated_tokens
+            self._client_finish[(rank, client_id)] = finish
+            entry = (rank, finish, next(self._arrivals))
+            heapq.heappush(self._queue, entry)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] == entry:
+                        delay = max(
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(estimated_tokens, now)
+                        )
+                        if delay <= 0:
+                            break
+                    else:
+                        delay = None
+
+                    remaining = arrived + max_wait_s - now
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise LLMQueueTimeout(
+                            f"LLM request waited over {max_wait_s:.1f}s for rate-limit budget"
+                        )
+                    self._condition.wait(remaining if delay is None else min(delay, remaining))
+
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self._virtual_time = max(self._virtual_time, start)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._prune_clients()
+                self._condition.notify_all()
+
+            waited_ms = (time.monotonic() - arrived) * 1000
+            self._stats["dispatched"][priority] += 1
+            self._stats["queue_wait_ms_total"][priority] += waited_ms
+            return waited_ms
+
+    def _prune_clients(self):
+        """
+        Forgets clients whose last finish is behind the virtual clock. Their
+        next request starts at _virtual_time either way, so only clients
+        with work still ahead of the clock keep an entry. Once the queue is
+        empty nobody is backlogged, so the clock jumps to the last finish
+        and every entry goes. Caller holds the lock.
+        """
+        if not self._queue and self._client_finish:
+            self._virtual_time = max(self._virtual_time, max(self._client_finish.values()))
+        for key in [key for key, finish in self._client_finish.items() if finish <= self._virtual_time]:
+            del self._client_finish[key]
+
+    # ── Feedback from Groq ────────────────────────────────────────────────────
+
+    def observe_headers(self, headers):
+        """Pulls the buckets down to Groq's x-ratelimit-remaining-* values."""
+        now = time.monotonic()
+        with self._condition:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is not None:
+                    bucket.sync(float(remaining), parse_reset(headers.get(f"x-ratelimit-reset-{kind}")), now)
+            self._stats["header_syncs"] += 1
+            self._condition.notify_all()
+
+    def observe_rate_limited(self, headers):
+        """A 429 got through: hold everything until Groq's retry-after."""
+        now = time.monotonic()
+        try:
+            retry_after = float(headers.get("retry-after", 1))
+        except ValueError:
+            retry_after = 1.0
+        with self._condition:
+            self._stats["rate_limited"] += 1
+            for bucket in (self.requests, self.tokens):
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+        self.observe_headers(headers)
+
+    def count_retry(self):
+        with self._condition:
+            self._stats["retries"] += 1
+
+    def release(self, estimated_tokens):
+        """Returns the budget of an admitted request that was never sent."""
+        with self._condition:
+            self.requests.adjust(1)
+            self.tokens.adjust(estimated_tokens)
+            self._condition.notify_all()
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Replaces the admission estimate with the tokens Groq actually counted."""
+        with self._condition:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            queued = {name: 0 for name in PRIORITIES}
+            for rank, _, _ in self._queue:
+                queued[_PRIORITY_NAMES[rank]] += 1
+            return {
+                "queued": queued,
+                "dispatched": dict(self._stats["dispatched"]),
+                "mean_queue_wait_ms": {
+                    name: round(self._stats["queue_wait_ms_total"][name] / count, 1) if count else 0.0
+                    for name, count in self._stats["dispatched"].items()
+                },
+                "timeouts": self._stats["timeouts"],
+                "rate_limited": self._stats["rate_limited"],
+                "retries": self._stats["retries"],
+                "header_syncs": self._stats["header_syncs"],
+                "requests_available": round(self.requests.level, 1),
+                "tokens_available": round(self.tokens.level, 1)
+            }
+
+
+# Module-level singleton — one budget per process, shared by every caller
+_scheduler = LLMScheduler()
+
+
+def get_scheduler():
+    return _scheduler
+
+
+def llm_scheduler_stats():
+    """Snapshot for the /metrics endpoint."""
+    return _scheduler.stats()
+
+
+def _retryable(error, has_deadline):
+    """429s, 5xx and dropped connections; timeouts only without a deadline."""
+    if isinstance(error, APITimeoutError):
+        return not has_deadline
+    if isinstance(error, APIConnectionError):
+        return True
+    return error.status_code == 429 or error.status_code >= 500
+
+
+def _send(messages, priority, client_id, timings, max_wait_s, deadline, kwargs):
+    """
+    Admits and sends one create() call, retrying per LLM_MAX_RETRIES.
+    Returns (raw response, token estimate). Queue waits of every attempt
+    add up in timings["llm_queue"].
+    """
+    estimate = estimate_tokens(messages, kwargs.get("max_tokens"))
+    has_deadline = deadline is not None
+    if not has_deadline:
+        deadline = time.monotonic() + max_wait_s
+    waited_total = 0.0
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        # ── Step 1: Wait for budget (all attempts share one deadline) ──────
+        waited_total += _scheduler.acquire(
+            estimate, priority, client_id, min(max_wait_s, deadline - time.monotonic())
+        )
+        if timings is not None:
+            timings["llm_queue"] = round(waited_total, 2)
+
+        if has_deadline:
+            kwargs["timeout"] = deadline - time.monotonic()
+            if kwargs["timeout"] <= 0:
+                _scheduler.release(estimate)
+                raise LLMQueueTimeout("LLM request admitted after its deadline")
+
+        # ── Step 2: Send; on a retryable error, back off and queue again ───
+        try:
+            raw = get_groq_client().chat.completions.with_raw_response.create(
+                model=GROQ_MODEL, messages=messages, **kwargs
+            )
+            _scheduler.observe_headers(raw.headers)
+            return raw, estimate
+        except (APIConnectionError, APIStatusError) as e:
+            rate_limited = isinstance(e, APIStatusError) and e.status_code == 429
+            if rate_limited:
+                # Blocks the buckets until retry-after — the next acquire waits it out
+                _scheduler.observe_rate_limited(e.response.headers)
+            else:
+                # Never served: return this attempt's budget, or a flaky
+                # upstream drains the buckets for work Groq did not do
+                _scheduler.release(estimate)
+            if attempt == LLM_MAX_RETRIES or not _retryable(e, has_deadline):
+                raise
+
+            # Counted in stats()["retries"] (/metrics) rather than logged
+            _scheduler.count_retry()
+            if not rate_limited:
+                time.sleep(min(0.5 * 2 ** attempt, max(0.0, deadline - time.monotonic())))
+
+
+def scheduled_completion(messages, priority="interactive", client_id=None, timings=None,
+                         max_wait_s=LLM_QUEUE_TIMEOUT_S, deadline=None, **kwargs):
+    """
+    chat.completions.create() behind the scheduler. Returns the parsed
+    ChatCompletion. The queue wait (ms) is stored in timings["llm_queue"].
+
+    With `deadline` (a time.monotonic() value), the queue wait stops there
+    and whatever time is left becomes the HTTP request timeout. A request
+    admitted after the deadline is not sent and its budget is returned.
+    Without one, all attempts together may queue for max_wait_s.
+    """
+    if deadline is not None:
+        max_wait_s = min(max_wait_s, deadline - time.monotonic())
+
+    raw, estimate = _send(messages, priority, client_id, timings, max_wait_s, deadline, kwargs)
+
+    response = raw.parse()
+    if response.usage is not None:
+        _scheduler.reconcile(estimate, response.usage.total_tokens)
+    return response
+
+
+def scheduled_stream(messages, priority="interactive", client_id=None, timings=None,
+                     max_wait_s=LLM_QUEUE_TIMEOUT_S, **kwargs):
+    """
+    Streaming variant of scheduled_completion(). Yields ChatCompletionChunks;
+    usage from Groq's final x_groq chunk is reconciled once the stream ends.
+    Only opening the stream is retried — once chunks flow, errors propagate.
+    """
+    raw, estimate = _send(messages, priority, client_id, timings, max_wait_s, None, dict(kwargs, stream=True))
+
+    for chunk in raw.parse():
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and x_groq.usage is not None:
+            _scheduler.reconcile(estimate, x_groq.usage.total_tokens)
+        yield chunk
@@ -1,8 +1,9 @@
-from sentence_transformers import CrossEncoder
+from src.embeddings.inference import get_cross_encoder, predict_bucketed
 import math
 
-# Load once globally (important for performance)
-reranker_model = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Load once globally (important for performance) — float or int8, see
+# src/embeddings/inference.py
+reranker_model = get_cross_encoder()
 
 
 def sigmoid(x):
@@ -29,8 +30,8 @@ def rerank_chunks(query, retrieved_docs, retrieved_metadata, top_k=3):
     # Prepare (query, document) pairs
     pairs = [(query, doc) for doc in retrieved_docs]
 
-    # Get raw relevance scores
-    scores = reranker_model.predict(pairs)
+    # Get raw relevance scores (length-bucketed batches, input order kept)
+    scores = predict_bucketed(reranker_model, pairs)
 
     # Combine docs + metadata + scores
     scored_docs = list(zip(retrieved_docs, retrieved_metadata, scores))
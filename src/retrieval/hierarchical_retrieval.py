@@ -0,0 +1,142 @@
+"""
+hierarchical_retrieval.py
+-------------------------
+Child search and token-budgeted parent expansion for
+HIERARCHICAL_RETRIEVAL.
+
+Place this file at: src/retrieval/hierarchical_retrieval.py
+
+How a query is answered with it (see answer_query.retrieve_evidence):
+    1. retrieve_children() searches the sentence-window children (see
+       src/chunking/sentence_window.py). Scope filters resolve against the
+       children's own metadata index — children carry their parent's
+       source, section and tags, and are never deduplicated, so the flat
+       collection's reference flags do not apply to them.
+    2. The reranker scores the children. They are short, so the cross-encoder
+       is both faster and more precise than on whole sections.
+    3. expand_context() turns the top children into LLM context:
+         - every hit starts as its own sentence window
+         - windows then grow by one neighbouring sentence per side per
+           round, round-robin over the hits, while the estimated token
+           total stays within CONTEXT_TOKEN_BUDGET
+         - sentences shared by two hits are counted once, and hits from
+           the same section merge into one block (gaps shown as " … ")
+       A short section can end up whole. A long one contributes only the
+       sentences around its hits, instead of all CHUNK_MAX_CHARS of a flat
+       chunk.
+
+Tokens are estimated the same way the LLM scheduler meters them
+(estimate_text_tokens, ~4 characters per token).
+
+Measure the effect on our corpus:
+    python -m src.evaluation.benchmark_hierarchical
+"""
+
+from src.embeddings.query_cache import embed_query
+from src.vectorstore.metadata_index import resolve_scope
+from src.vectorstore.parent_store import get_parent
+from src.llm.scheduler import estimate_text_tokens
+from src.config.settings import CONTEXT_TOKEN_BUDGET
+
+
+def retrieve_children(collection, query, top_k=10, filters=None):
+    """
+    Top_k children closest to the query, in ChromaDB's query result shape.
+    `filters` is the same scope dict retrieve_chunks() accepts.
+    """
+    return search_children(collection, embed_query(query), top_k, filters)
+
+
+def search_children(collection, query_embedding, top_k=10, filters=None):
+    """retrieve_children() for an already-embedded query."""
+    scope = resolve_scope(filters, collection="children")
+    if scope is None:
+        return collection.query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=min(top_k, collection.count())
+        )
+
+    where, candidate_ids = scope
+    if not candidate_ids:
+        return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+    return collection.query(
+        query_embeddings=[query_embedding.tolist()],
+        n_results=min(top_k, len(candidate_ids)),
+        where=where
+    )
+
+
+def expand_context(hits, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Assembles LLM context from ranked child hits within a token budget.
+
+    Args:
+        hits   : child metadata dicts, best first (parent_id, sent_start,
+                 sent_end as stored — strings are fine).
+        budget : estimated tokens for all returned blocks together. The
+                 first hit is always included, even if it alone is larger.
+
+    Returns:
+        (docs, metadata, tokens) — one text block and parent metadata per
+        section, in order of that section's best hit, plus the estimated
+        tokens used.
+    """
+    covered = {}    # parent_id → sentence indices included
+    spans = []      # [parent_id, start, stop] per accepted hit
+    used = 0
+
+    # ── Seed: each hit's own window, best first, while it fits ─────────────
+    for meta in hits:
+        parent_id = int(meta["parent_id"])
+        start, stop = int(meta["sent_start"]), int(meta["sent_end"])
+        sentences = get_parent(parent_id)["sentences"]
+        seen = covered.setdefault(parent_id, set())
+
+        cost = sum(estimate_text_tokens(sentences[i]) for i in range(start, stop) if i not in seen)
+        if spans and used + cost > budget:
+            continue
+
+        used += cost
+        seen.update(range(start, stop))
+        spans.append([parent_id, start, stop])
+
+    # ── Grow: one neighbouring sentence per side per round, round-robin ────
+    grew = True
+    while grew:
+        grew = False
+        for span in spans:
+            parent_id, start, stop = span
+            sentences = get_parent(parent_id)["sentences"]
+            seen = covered[parent_id]
+
+            for i in (start - 1, stop):
+                if not 0 <= i < len(sentences):
+                    continue
+                cost = 0 if i in seen else estimate_text_tokens(sentences[i])
+                if used + cost > budget:
+                    continue
+                used += cost
+                seen.add(i)
+                span[1], span[2] = min(span[1], i), max(span[2], i + 1)
+                grew = True
+
+    # ── Assemble: one block per parent, contiguous runs joined ─────────────
+    docs, metadata = [], []
+    for parent_id in dict.fromkeys(span[0] for span in spans):
+        parent = get_parent(parent_id)
+        indices = sorted(covered[parent_id])
+
+        runs, run = [], [indices[0]]
+        for i in indices[1:]:
+            if i == run[-1] + 1:
+                run.append(i)
+            else:
+                runs.append(run)
+                run = [i]
+        runs.append(run)
+
+        docs.append(" … ".join(" ".join(parent["sentences"][i] for i in run) for run in runs))
+        metadata.append(dict(parent["metadata"], parent_id=str(parent_id)))
+
+    return docs, metadata, used
@@ -0,0 +1,322 @@
+"""
+query_expansion.py
+------------------
+Optional multi-query expansion with reciprocal rank fusion (RRF).
+
+Place this file at: src/retrieval/query_expansion.py
+
+Why expand?
+    Short or vague questions ("MFA rules?") embed poorly on their own.
+    Retrieving with a larger top_k papers over that, but every extra chunk
+    costs reranking time and LLM context. Instead we search with a few
+    reformulations and fuse their rankings:
+
+        1. Rule-based rewrites from the policy glossary below — acronyms
+           ↔ their expansions, plus common synonyms. Free and instant.
+        2. Optional LLM rewrites (QUERY_EXPANSION_USE_LLM), requested in
+           the background as soon as the query arrives.
+        3. All rewrites are embedded in ONE batch (cache misses only) and
+           their vector searches run concurrently on a shared thread pool.
+        4. Rankings are fused with RRF: score = Σ 1 / (RRF_K + rank).
+           Rewrites only change the order. Every chunk's distance is
+           measured from the original query, so the evidence gate still
+           judges the question the user actually asked.
+
+    Latency is capped by QUERY_EXPANSION_BUDGET_MS. The original query is
+    searched on the calling thread and is always used. At the deadline:
+        - the LLM rewrite stops waiting for rate-limit budget, and its
+          Groq request times out, so late rewrites cost no further quota
+        - vector searches still running cannot be interrupted. They finish
+          in the background and their results are discarded ("late")
+    Searches are only queued while the pool has an idle worker. Under load,
+    expansions are skipped rather than piling up behind earlier requests'
+    late work.
+"""
+
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+from src.embeddings.query_cache import embed_queries, normalize_query
+from src.retrieval.retrieve_chunks import search_by_embedding
+from src.llm.scheduler import scheduled_completion
+from src.config.settings import (
+    QUERY_EXPANSION_MAX,
+    QUERY_EXPANSION_USE_LLM,
+    QUERY_EXPANSION_BUDGET_MS,
+    RRF_K
+)
+
+
+# Acronyms used across information security policies → their expansions
+POLICY_GLOSSARY = {
+    "ISMS": "information security management system",
+    "BCP": "business continuity plan",
+    "DR": "disaster recovery",
+    "SLA": "service level agreement",
+    "MFA": "multi-factor authentication",
+    "PII": "personally identifiable information",
+    "NDA": "non-disclosure agreement",
+    "IAM": "identity and access management",
+    "RBAC": "role-based access control",
+    "CISO": "chief information security officer",
+    "BYOD": "bring your own device",
+    "DLP": "data loss prevention",
+    "RTO": "recovery time objective",
+    "RPO": "recovery point objective",
+    "VPN": "virtual private network",
+    "PDCA": "plan do check act",
+}
+
+# Everyday wording → the terms policy documents tend to use
+SYNONYMS = {
+    "vendor": ["supplier", "third party"],
+    "vendors": ["suppliers", "third parties"],
+    "password": ["credential"],
+    "passwords": ["credentials"],
+    "employee": ["staff member", "personnel"],
+    "employees": ["staff", "personnel"],
+    "breach": ["security incident"],
+    "laptop": ["endpoint device"],
+    "rules": ["requirements"],
+}
+
+
+def _compile_rewrite_rules():
+    """Precompiles (pattern, replacement) pairs once at import time."""
+    rules = []
+
+    for acronym, expansion in POLICY_GLOSSARY.items():
+        # Short acronyms ("DR") only match in capitals so ordinary words are left alone
+        if len(acronym) >= 3:
+            acronym_pattern = rf"\b(?:{acronym}|{acronym.lower()})\b"
+        else:
+            acronym_pattern = rf"\b{acronym}\b"
+        rules.append((re.compile(acronym_pattern), expansion))
+        rules.append((re.compile(rf"\b{re.escape(expansion)}\b", re.IGNORECASE), acronym))
+
+    for term, alternatives in SYNONYMS.items():
+        pattern = re.compile(rf"\b{re.escape(term)}\b", re.IGNORECASE)
+        for alternative in alternatives:
+            rules.append((pattern, alternative))
+
+    return rules
+
+
+_REWRITE_RULES = _compile_rewrite_rules()
+
+# Shared pool for concurrent vector queries and background LLM rewrites
+_POOL_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=_POOL_WORKERS, thread_name_prefix="query-expansion")
+_in_flight = 0          # tasks queued or running on the pool
+
+_stats = {"queries": 0, "expansions_used": 0, "expansions_late": 0, "expansions_skipped": 0}
+_lock = threading.Lock()
+
+
+def _task_done(_future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def _submit(fn, *args):
+    """Queues fn on the pool if a worker is idle; returns None when saturated."""
+    global _in_flight
+    with _lock:
+        if _in_flight >= _POOL_WORKERS:
+            return None
+        _in_flight += 1
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(_task_done)
+    return future
+
+
+def rule_based_expansions(query, max_expansions=QUERY_EXPANSION_MAX):
+    """
+    Rewrites the query with glossary and synonym substitutions.
+    Returns up to max_expansions distinct rewrites, never the query itself.
+    """
+    seen = {normalize_query(query)}
+    expansions = []
+
+    for pattern, replacement in _REWRITE_RULES:
+        if len(expansions) >= max_expansions:
+            break
+
+        rewritten = pattern.sub(replacement, query)
+        key = normalize_query(rewritten)
+        if key not in seen:
+            seen.add(key)
+            expansions.append(rewritten)
+
+    return expansions
+
+
+def llm_rewrites(query, n=2, deadline=None):
+    """
+    Asks Groq for n alternative phrasings of the query.
+
+    Rewrites are optional, so they queue as "batch" work behind answer
+    generation. Both the queue wait and the Groq request end at `deadline`
+    (time.monotonic(); default: one expansion budget from now).
+    """
+    if deadline is None:
+        deadline = time.monotonic() + QUERY_EXPANSION_BUDGET_MS / 1000
+    if time.monotonic() >= deadline:
+        return []
+
+    response = scheduled_completion(
+        [
+            {
+                "role": "system",
+                "content": (
+                    f"Rewrite the user's question about an information security policy "
+                    f"into {n} alternative phrasings. Reply with one phrasing per line "
+                    f"and nothing else."
+                )
+            },
+            {"role": "user", "content": query}
+        ],
+        priority="batch",
+        deadline=deadline,
+        temperature=0,
+        max_tokens=120,
+    )
+
+    lines = response.choices[0].message.content.splitlines()
+    rewrites = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in lines]
+    return [rewrite for rewrite in rewrites if rewrite][:n]
+
+
+def reciprocal_rank_fusion(result_sets, top_k, k=RRF_K):
+    """
+    Fuses several ChromaDB-shaped result sets into one ranking.
+
+    Each chunk scores Σ 1 / (k + rank) over the lists it appears in.
+    result_sets[0] must be the original query's results: distances are
+    only taken from it, so rewrites change the order but never make a
+    chunk look closer to what the user asked. Chunks only a rewrite found
+    get distance None — see original_distances().
+    """
+    fused = {}
+
+    for set_index, results in enumerate(result_sets):
+        for rank, chunk_id in enumerate(results["ids"][0], start=1):
+            entry = fused.get(chunk_id)
+            if entry is None:
+                entry = fused[chunk_id] = {
+                    "score": 0.0,
+                    "document": results["documents"][0][rank - 1],
+                    "metadata": results["metadatas"][0][rank - 1],
+                    "distance": None
+                }
+            entry["score"] += 1.0 / (k + rank)
+            if set_index == 0:
+                entry["distance"] = results["distances"][0][rank - 1]
+
+    ranked = sorted(fused.items(), key=lambda item: item[1]["score"], reverse=True)[:top_k]
+
+    return {
+        "ids": [[chunk_id for chunk_id, _ in ranked]],
+        "documents": [[entry["document"] for _, entry in ranked]],
+        "metadatas": [[entry["metadata"] for _, entry in ranked]],
+        "distances": [[entry["distance"] for _, entry in ranked]]
+    }
+
+
+def original_distances(collection, fused, query_embedding):
+    """
+    Fills in distances rewrite-only chunks are missing, scored against the
+    original query's embedding (squared L2, like the collection), so the
+    evidence gate's dense score always measures the user's own question.
+    """
+    distances = fused["distances"][0]
+    missing = [chunk_id for chunk_id, d in zip(fused["ids"][0], distances) if d is None]
+    if not missing:
+        return fused
+
+    records = collection.get(ids=missing, include=["embeddings"])
+    vectors = np.asarray(records["embeddings"], dtype=np.float32)
+    rescored = dict(zip(records["ids"], ((vectors - query_embedding) ** 2).sum(axis=1).tolist()))
+
+    fused["distances"][0] = [
+        rescored[chunk_id] if d is None else d for chunk_id, d in zip(fused["ids"][0], distances)
+    ]
+    return fused
+
+
+def expanded_retrieve(collection, query, top_k=5, filters=None):
+    """
+    Drop-in replacement for retrieve_chunks() that searches with the query
+    plus its reformulations and returns the RRF-fused top_k.
+    """
+    deadline = time.monotonic() + QUERY_EXPANSION_BUDGET_MS / 1000
+    late = skipped = 0
+
+    # Start the (slow) LLM rewrite first so it overlaps with everything else
+    rewrite_future = None
+    if QUERY_EXPANSION_USE_LLM:
+        rewrite_future = _submit(llm_rewrites, query, 2, deadline)
+        skipped += rewrite_future is None
+
+    queries = [query] + rule_based_expansions(query)
+    embeddings = embed_queries(queries)
+
+    futures = []
+    for embedding in embeddings[1:]:
+        future = _submit(search_by_embedding, collection, embedding, top_k, filters)
+        if future is None:
+            skipped += 1
+        else:
+            futures.append(future)
+
+    # The original query runs here, not in the pool, so a busy pool can
+    # only ever cost us expansions — never the base result
+    result_sets = [search_by_embedding(collection, embeddings[0], top_k, filters)]
+
+    if rewrite_future is not None:
+        # llm_rewrites stops itself at the deadline, so a late rewrite
+        # is not left holding a worker or spending quota
+        done, _ = wait([rewrite_future], timeout=max(0.0, deadline - time.monotonic()))
+        if rewrite_future in done and rewrite_future.exception() is None:
+            seen = {normalize_query(q) for q in queries}
+            rewrites = [r for r in rewrite_future.result() if normalize_query(r) not in seen]
+            for embedding in (embed_queries(rewrites) if rewrites else []):
+                future = _submit(search_by_embedding, collection, embedding, top_k, filters)
+                if future is None:
+                    skipped += 1
+                else:
+                    futures.append(future)
+        else:
+            late += 1
+
+    done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    for future in futures:
+        if future in done and future.exception() is None:
+            result_sets.append(future.result())
+        else:
+            # Cannot be interrupted once running — it finishes unobserved
+            future.cancel()
+            late += 1
+
+    with _lock:
+        _stats["queries"] += 1
+        _stats["expansions_used"] += len(result_sets) - 1
+        _stats["expansions_late"] += late
+        _stats["expansions_skipped"] += skipped
+
+    return original_distances(collection, reciprocal_rank_fusion(result_sets, top_k), embeddings[0])
+
+
+def query_expansion_stats():
+    """
+    Snapshot of expansion counters, for the /metrics endpoint.
+    expansions_late: missed the deadline or failed, result discarded.
+    expansions_skipped: never queued because the pool was saturated.
+    """
+    with _lock:
+        return dict(_stats)
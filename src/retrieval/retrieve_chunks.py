@@ -1,10 +1,114 @@
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from src.embeddings.query_cache import embed_query
+from src.config.settings import SCOPE_EXACT_SCAN_MAX, BINARY_INDEX_ENABLED, BINARY_INDEX_CANDIDATES
+from src.vectorstore.metadata_index import resolve_scope
+from src.vectorstore.binary_index import binary_candidates, binary_index_size
+
+
+def _empty_results():
+    """Query results in ChromaDB's shape for a scope that matched nothing."""
+    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+def _exact_scan(collection, query_embedding, candidate_ids, top_k):
+    """
+    Scores a small candidate subset exactly instead of querying the HNSW index.
+    Distances are squared L2, matching the collection's default space.
+    """
+    records = collection.get(
+        ids=sorted(candidate_ids),
+        include=["embeddings", "documents", "metadatas"]
+    )
+
+    vectors = np.asarray(records["embeddings"], dtype=np.float32)
+    distances = ((vectors - query_embedding) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:top_k]
+
+    return {
+        "ids": [[records["ids"][i] for i in order]],
+        "documents": [[records["documents"][i] for i in order]],
+        "metadatas": [[records["metadatas"][i] for i in order]],
+        "distances": [[float(distances[i]) for i in order]]
+    }
+
+
+def _binary_scan(collection, query_embedding, top_k, n_candidates, allowed_ids=None):
+    """
+    Two-stage search (see binary_index.py): Hamming-nearest candidates from
+    the in-process codes, rescored with their embeddings read from
+    ChromaDB. Documents and metadata are read for the top_k only.
+    """
+    candidate_ids = binary_candidates(query_embedding, n_candidates, allowed_ids)
+    if not candidate_ids:
+        return _empty_results()
+
+    records = collection.get(ids=candidate_ids, include=["embeddings"])
+    vectors = np.asarray(records["embeddings"], dtype=np.float32)
+    distances = ((vectors - query_embedding) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:top_k]
+    ids = [records["ids"][i] for i in order]
+
+    details = collection.get(ids=ids, include=["documents", "metadatas"])
+    position = {chunk_id: i for i, chunk_id in enumerate(details["ids"])}
+
+    return {
+        "ids": [ids],
+        "documents": [[details["documents"][position[chunk_id]] for chunk_id in ids]],
+        "metadatas": [[details["metadatas"][position[chunk_id]] for chunk_id in ids]],
+        "distances": [[float(distances[i]) for i in order]]
+    }
+
+
+def search_by_embedding(collection, query_embedding, top_k=5, filters=None):
+    """
+    Vector search for an already-embedded query.
+
+    `filters` optionally scopes the search by "source", "section" (exact or
+    a prefix such as "5.*") and "tags" — see resolve_scope(). Scoped queries
+    are pushed down to ChromaDB as a `where` pre-filter, and scopes small
+    enough to score exactly never touch the HNSW index at all.
+
+    With BINARY_INDEX_ENABLED, searches too large for an exact scan use the
+    binary first stage (see binary_index.py) instead of the HNSW index: the
+    Hamming-nearest BINARY_INDEX_CANDIDATES are rescored at full precision.
+    """
+    scope = resolve_scope(filters)
+    use_binary = BINARY_INDEX_ENABLED and binary_index_size() > 0
+    n_candidates = max(BINARY_INDEX_CANDIDATES, top_k)
+
+    if scope is None:
+        if use_binary:
+            return _binary_scan(collection, query_embedding, top_k, n_candidates)
+        return collection.query(
+            query_embeddings=[query_embedding.tolist()],
+            n_results=top_k
+        )
+
+    where, candidate_ids = scope
+
+    if not candidate_ids:
+        return _empty_results()
+
+    if len(candidate_ids) <= SCOPE_EXACT_SCAN_MAX:
+        return _exact_scan(collection, query_embedding, candidate_ids, top_k)
+
+    if use_binary:
+        return _binary_scan(collection, query_embedding, top_k, n_candidates, allowed_ids=candidate_ids)
 
-def retrieve_chunks(collection, query, top_k=5):
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    query_embedding = model.encode(query).tolist()
     results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=top_k
+        query_embeddings=[query_embedding.tolist()],
+        n_results=min(top_k, len(candidate_ids)),
+        where=where
     )
-    return results
\ No newline at end of file
+    return results
+
+
+def retrieve_chunks(collection, query, top_k=5, filters=None):
+    """
+    Retrieves the top_k chunks closest to the query, optionally scoped by
+    `filters` (see search_by_embedding).
+    """
+    # Shared model + LRU cache — repeated questions skip the forward pass
+    query_embedding = embed_query(query)
+
+    return search_by_embedding(collection, query_embedding, top_k=top_k, filters=filters)
@@ -5,19 +5,31 @@ Full ingestion pipeline: PDF → clean → chunk → embed → store in ChromaDB
 """
 
 import os
+import time
 from dotenv import load_dotenv
 from src.ingestion.pdf_loader import load_pdf
 from src.cleaning.clean_documents import clean_documents
 from src.chunking.apply_chunking import chunk_clean_documents
+from src.chunking.near_duplicates import deduplicate_chunks
+from src.chunking.sentence_window import build_hierarchy
+from src.chunking.token_chunker import truncation_stats
 from src.embeddings.embed_chunks import embed_chunks
-from src.vectorstore.chroma_store import create_chroma_collection
-from src.vectorstore.store_chunks import store_chunks
+from src.vectorstore.chroma_store import create_chroma_collection, create_child_collection
+from src.vectorstore.store_chunks import store_chunks, store_child_chunks
+from src.vectorstore.parent_store import add_parents, clear_parents
+from src.vectorstore.metadata_index import clear_metadata_index
+from src.vectorstore.binary_index import clear_binary_index
+from src.config.settings import DOCUMENT_TAGS, DEDUP_ENABLED, HIERARCHICAL_RETRIEVAL
+from src.utils.memory_profiler import profile_stage
 
 
-def run_ingestion():
+def run_ingestion(hierarchical=HIERARCHICAL_RETRIEVAL):
     """
     Runs the full document ingestion pipeline and stores chunks in ChromaDB.
     Called automatically by answer_query.py if the vector store is empty.
+
+    With `hierarchical`, section parents and sentence-window children are
+    also built and stored for hierarchical retrieval.
     """
 
     load_dotenv()
@@ -43,11 +55,20 @@ def run_ingestion():
             f"Please make sure the file exists at data/raw_pdfs/ in your project root."
         )
 
+    # ── In-process indexes start empty ─────────────────────────────────────────
+    # The metadata, binary and parent indexes only append, while ChromaDB
+    # skips ids it already holds. A second run in the same process (cold
+    # start in answer_query, the benchmark scripts) must not stack rows.
+    clear_metadata_index()
+    clear_binary_index()
+    clear_parents()
+
     print("\n==============================")
     print("STEP 1: Loading PDF")
     print("==============================\n")
 
-    raw_docs = load_pdf(pdf_path)
+    with profile_stage("ingest.load_pdf"):
+        raw_docs = load_pdf(pdf_path)
     print(f"Pages loaded: {len(raw_docs)}")
 
     print("\n==============================")
@@ -61,40 +82,88 @@ def run_ingestion():
     print("STEP 3: Cleaning Pages")
     print("==============================\n")
 
-    clean_docs = clean_documents(filtered_docs)
+    with profile_stage("ingest.clean"):
+        clean_docs = clean_documents(filtered_docs)
 
     print("\n==============================")
     print("STEP 4: Merging Pages")
     print("==============================\n")
 
     merged_text = "\n\n".join(doc["text"] for doc in clean_docs)
+    source = clean_docs[0]["metadata"]["source"]
     merged_doc = [{
         "text": merged_text,
-        "metadata": {"source": clean_docs[0]["metadata"]["source"]}
+        "metadata": {
+            "source": source,
+            "tags": DOCUMENT_TAGS.get(source)
+        }
     }]
 
     print("\n==============================")
     print("STEP 5: Section-Based Chunking")
     print("==============================\n")
 
-    chunks = chunk_clean_documents(merged_doc)
-    print(f"Total chunks created: {len(chunks)}\n")
+    with profile_stage("ingest.chunk"):
+        chunks = chunk_clean_documents(merged_doc)
+    print(f"Total chunks created: {len(chunks)}")
+
+    # Chunks longer than the encoder's sequence limit lose their tail
+    truncation = truncation_stats(chunks.texts())
+    print(
+        f"Chunks truncated by the encoder: {truncation['truncated']} "
+        f"({truncation['truncated_fraction']:.1%}, {truncation['dropped_fraction']:.1%} of tokens)\n"
+    )
+
+    print("\n==============================")
+    print("STEP 6: Near-Duplicate Elimination")
+    print("==============================\n")
+
+    if DEDUP_ENABLED:
+        with profile_stage("ingest.dedup"):
+            chunks, dedup_stats = deduplicate_chunks(chunks)
+        print(
+            f"Near-duplicates collapsed: {dedup_stats['duplicates_removed']} "
+            f"({dedup_stats['chunks_in']} → {dedup_stats['chunks_out']} chunks, "
+            f"{dedup_stats['bytes_saved'] / 1024:.1f} KB text and "
+            f"{dedup_stats['embedding_bytes_saved'] / 1024:.1f} KB embeddings saved)"
+        )
+    else:
+        print("Skipped (DEDUP_ENABLED=false)")
 
     print("\n==============================")
-    print("STEP 6: Generating Embeddings")
+    print("STEP 7: Generating Embeddings")
     print("==============================\n")
 
-    embeddings = embed_chunks(chunks)
+    start = time.perf_counter()
+    with profile_stage("ingest.embed"):
+        embeddings = embed_chunks(chunks)
+    seconds = time.perf_counter() - start
     print(f"Embedding shape: {embeddings.shape}")
+    print(f"Embedding throughput: {len(chunks) / seconds:.1f} chunks/s "
+          f"({chunks.text_chars / seconds / 1024:.1f} KB/s of text)")
 
     print("\n==============================")
-    print("STEP 7: Storing in ChromaDB")
+    print("STEP 8: Storing in ChromaDB")
     print("==============================\n")
 
-    collection = create_chroma_collection()
-    store_chunks(collection, chunks, embeddings)
+    with profile_stage("ingest.store"):
+        collection = create_chroma_collection()
+        store_chunks(collection, chunks, embeddings)
 
     print(f"Ingestion complete. {len(chunks)} chunks stored in ChromaDB.")
+
+    if hierarchical:
+        print("\n==============================")
+        print("STEP 9: Building Hierarchical Index")
+        print("==============================\n")
+
+        with profile_stage("ingest.hierarchy"):
+            parents, children = build_hierarchy(merged_doc)
+            child_embeddings = embed_chunks(children)
+            add_parents(parents)
+            store_child_chunks(create_child_collection(), children, child_embeddings)
+        print(f"Parents: {len(parents)}, sentence-window children: {len(children)}")
+
     return collection
 
 
@@ -105,7 +174,7 @@ if __name__ == "__main__":
     collection = run_ingestion()
 
     print("\n==============================")
-    print("STEP 8: Testing Retrieval")
+    print("STEP 10: Testing Retrieval")
     print("==============================\n")
 
     query = "What is the scope of this policy?"
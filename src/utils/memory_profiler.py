@@ -0,0 +1,201 @@
+"""
+memory_profiler.py
+------------------
+Per-stage timing and memory instrumentation for ingestion and query answering.
+
+Place this file at: src/utils/memory_profiler.py
+
+Usage:
+    with profile_stage("embed", timings):
+        embeddings = embed_chunks(chunks)
+
+Every stage is timed (cheap — two perf_counter calls). The duration is
+written into the optional `timings` dict, which answer_query returns as
+"timings_ms", and into a rolling window per stage for /metrics.
+
+With MEMORY_PROFILING=true each stage also prints:
+    - process RSS before/after (what the pod's memory limit actually sees)
+    - the net Python allocation delta from tracemalloc, plus the top
+      allocation sites (file:line) that grew during the stage
+
+With the flag off, the memory half is skipped entirely, so the
+instrumentation can stay in the pipeline permanently.
+
+tracemalloc is process-wide: its peak resets for everyone and its
+snapshots include every thread's allocations. With the flag on, profiled
+stages therefore run one at a time (a process-wide lock), so concurrent
+/ask requests queue for each other and no other stage runs inside a
+sample. Stages must not nest. Profile under load only to find where
+memory goes, not to measure latency.
+
+The latest sample per stage is kept in memory so /metrics and the soak
+harness (src/evaluation/memory_soak.py) can read it back.
+"""
+
+import os
+import sys
+import math
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from src.config.settings import MEMORY_PROFILING, MEMORY_PROFILING_TOP
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# stage name → latest memory sample
+_stage_samples = {}
+# stage name → recent durations (ms), bounded so long-running servers stay flat
+_stage_durations = {}
+_lock = threading.Lock()
+# Held for the whole of a stage while MEMORY_PROFILING is on. A plain Lock,
+# not an RLock: a streamed stage may resume (and release) on another thread.
+_profile_lock = threading.Lock()
+
+TIMING_WINDOW = 2048
+
+
+def current_rss_bytes():
+    """
+    Current resident set size of this process.
+
+    Reads /proc/self/statm on Linux (cheap, no dependencies). Elsewhere falls
+    back to the peak RSS from getrusage, which is the best the stdlib offers.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS but KB everywhere else
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mb(n_bytes):
+    return round(n_bytes / (1024 * 1024), 2)
+
+
+def _record_duration(name, elapsed_ms, timings):
+    if timings is not None:
+        timings[name] = round(elapsed_ms, 1)
+
+    with _lock:
+        durations = _stage_durations.get(name)
+        if durations is None:
+            durations = _stage_durations[name] = deque(maxlen=TIMING_WINDOW)
+        durations.append(elapsed_ms)
+
+
+@contextmanager
+def profile_stage(name, timings=None):
+    """
+    Times one pipeline stage, and samples RSS and Python allocations around
+    it when MEMORY_PROFILING is on.
+
+    Args:
+        name    : Stage name, e.g. "query.retrieve".
+        timings : Optional dict that receives {name: duration_ms}.
+    """
+    start = time.perf_counter()
+
+    if not MEMORY_PROFILING:
+        try:
+            yield
+        finally:
+            _record_duration(name, (time.perf_counter() - start) * 1000, timings)
+        return
+
+    # One profiled stage at a time — see the module docstring. The wait
+    # is not part of the stage's duration.
+    with _profile_lock_held():
+        start = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        rss_before = current_rss_bytes()
+        snapshot_before = tracemalloc.take_snapshot()
+        # Peak of this stage, not of the whole process so far
+        tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            _record_duration(name, (time.perf_counter() - start) * 1000, timings)
+            _record_memory(name, rss_before, snapshot_before)
+
+
+@contextmanager
+def _profile_lock_held():
+    # acquire()/release() rather than `with _profile_lock` so the release
+    # may happen on whichever thread resumes a streamed stage
+    _profile_lock.acquire()
+    try:
+        yield
+    finally:
+        _profile_lock.release()
+
+
+def _record_memory(name, rss_before, snapshot_before):
+    peak_traced = tracemalloc.get_traced_memory()[1]
+    snapshot_after = tracemalloc.take_snapshot()
+    rss_after = current_rss_bytes()
+
+    diff = snapshot_after.compare_to(snapshot_before, "lineno")
+    python_delta = sum(stat.size_diff for stat in diff)
+
+    sample = {
+        "rss_before_mb": _mb(rss_before),
+        "rss_after_mb": _mb(rss_after),
+        "rss_delta_mb": _mb(rss_after - rss_before),
+        "python_alloc_delta_mb": _mb(python_delta),
+        "peak_traced_mb": _mb(peak_traced)
+    }
+
+    with _lock:
+        _stage_samples[name] = sample
+
+    print(
+        f"[memory] {name}: rss {sample['rss_before_mb']} → {sample['rss_after_mb']} MB "
+        f"({sample['rss_delta_mb']:+} MB), python allocations {sample['python_alloc_delta_mb']:+} MB"
+    )
+    for stat in diff[:MEMORY_PROFILING_TOP]:
+        frame = stat.traceback[0]
+        print(f"[memory]     {frame.filename}:{frame.lineno}  {stat.size_diff / 1024:+.1f} KB")
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def stage_timing_stats():
+    """Mean / p50 / p95 per stage over the most recent TIMING_WINDOW calls, for /metrics."""
+    with _lock:
+        windows = {name: sorted(durations) for name, durations in _stage_durations.items()}
+
+    return {
+        name: {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 1),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p95_ms": round(_percentile(values, 95), 1)
+        }
+        for name, values in windows.items() if values
+    }
+
+
+def memory_stats():
+    """Current RSS plus the latest sample per profiled stage, for /metrics."""
+    with _lock:
+        stages = {name: dict(sample) for name, sample in _stage_samples.items()}
+
+    return {
+        "enabled": MEMORY_PROFILING,
+        "rss_mb": _mb(current_rss_bytes()),
+        "stages": stages
+    }
@@ -0,0 +1,158 @@
+"""
+binary_index.py
+---------------
+Sign-binarized copy of every chunk embedding, used as a cheap first stage
+in front of full-precision scoring.
+
+Place this file at: src/vectorstore/binary_index.py
+
+Why?
+    A MiniLM embedding is 384 float32 values — 1536 bytes. Keeping only
+    the sign of each dimension packs it into 384 bits = 48 bytes, so a
+    full scan reads 32x less memory. For unit-length sentence embeddings,
+    the Hamming distance between sign codes tracks the angle between the
+    vectors closely enough to find the neighbourhood of a query. It does
+    not rank that neighbourhood precisely, though.
+
+    Only the codes stay resident: 48 bytes per chunk (plus its id)
+    instead of a 1536-byte float32 row. Full-precision vectors stay in
+    ChromaDB's persisted store and are read per query for the few
+    hundred candidates only.
+
+Two-stage search (see retrieve_chunks.search_by_embedding):
+    1. XOR the query code against every stored code and count differing
+       bits — np.bitwise_count on 64-bit words where NumPy has it (>= 2.0),
+       otherwise a 65536-entry popcount table over 16-bit words. Either
+       way it is one vectorized pass over n × 48 bytes.
+    2. Take the BINARY_INDEX_CANDIDATES closest codes, fetch their
+       embeddings from ChromaDB and rescore them exactly. Documents and
+       metadata are fetched for the final top_k only.
+
+    Scoped queries pass their candidate ids as a mask, so the scan only
+    considers chunks inside the scope.
+
+Like metadata_index.py, the index is module-level state filled by
+store_chunks() during ingestion and kept for the life of the process.
+"""
+
+import sys
+
+import numpy as np
+
+
+# Bits set in every 16-bit value — the fallback popcount for NumPy < 2.0
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_POPCOUNT16 = _BYTE_POPCOUNT[np.arange(1 << 16) & 0xFF] + _BYTE_POPCOUNT[np.arange(1 << 16) >> 8]
+
+_blocks = []          # packed codes per stored batch, joined on first search
+_codes = None         # (n, dims/8) uint8
+_ids = []             # row → chunk id
+_rows = {}            # chunk id → row
+
+
+def binarize(embeddings):
+    """Packs the sign bit of each dimension: (n, 384) float → (n, 48) uint8."""
+    return np.packbits(np.asarray(embeddings) > 0, axis=-1)
+
+
+def hamming_distances(codes, query_code):
+    """
+    Differing bits between `query_code` and every row of `codes`. Codes
+    are read as wider words; 48-byte codes divide evenly into both.
+    """
+    codes = np.ascontiguousarray(codes)
+    query_code = np.ascontiguousarray(query_code)
+
+    if hasattr(np, "bitwise_count") and codes.shape[-1] % 8 == 0:
+        xor = np.bitwise_xor(codes.view(np.uint64), query_code.view(np.uint64))
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.uint16)
+
+    xor = np.bitwise_xor(codes.view(np.uint16), query_code.view(np.uint16))
+    return np.take(_POPCOUNT16, xor).sum(axis=1, dtype=np.uint16)
+
+
+def nearest_rows(distances, n):
+    """Row indices of the n smallest distances, closest first."""
+    n = min(n, len(distances))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    rows = np.argpartition(distances, n - 1)[:n]
+    return rows[np.argsort(distances[rows], kind="stable")]
+
+
+def add_to_binary_index(ids, embeddings):
+    """
+    Adds a batch of stored chunks. `embeddings` rows line up with `ids`.
+    Only their sign codes are kept.
+    """
+    global _codes
+
+    for chunk_id in ids:
+        _rows[chunk_id] = len(_ids)
+        _ids.append(chunk_id)
+
+    _blocks.append(binarize(embeddings))
+    _codes = None
+
+
+def clear_binary_index():
+    """Drops every code. run_ingestion() calls it before storing anything."""
+    global _codes
+    _blocks.clear()
+    _ids.clear()
+    _rows.clear()
+    _codes = None
+
+
+def _all_codes():
+    global _codes
+    if _codes is None:
+        _codes = np.concatenate(_blocks) if _blocks else np.empty((0, 0), dtype=np.uint8)
+        _blocks[:] = [_codes]
+    return _codes
+
+
+def binary_candidates(query_embedding, n, allowed_ids=None):
+    """
+    Chunk ids of the n stored codes closest to the query in Hamming distance.
+
+    Args:
+        allowed_ids : Optional set of chunk ids to restrict the scan to
+                      (a resolved retrieval scope).
+    """
+    codes = _all_codes()
+    query_code = binarize(query_embedding)
+
+    if allowed_ids is None:
+        rows = nearest_rows(hamming_distances(codes, query_code), n)
+        return [_ids[row] for row in rows]
+
+    subset = np.fromiter(
+        (_rows[chunk_id] for chunk_id in allowed_ids if chunk_id in _rows),
+        dtype=np.intp
+    )
+    rows = nearest_rows(hamming_distances(codes[subset], query_code), n)
+    return [_ids[subset[row]] for row in rows]
+
+
+def binary_index_size():
+    return len(_ids)
+
+
+def binary_index_stats():
+    """
+    Codes plus the id bookkeeping — everything this index keeps resident.
+    No float32 vector is held here.
+    """
+    codes = _all_codes()
+    resident = (
+        codes.nbytes
+        + sys.getsizeof(_ids) + sys.getsizeof(_rows)
+        + sum(sys.getsizeof(chunk_id) for chunk_id in _ids)
+    )
+    return {
+        "vectors": len(_ids),
+        "code_bytes": int(codes.nbytes),
+        "resident_bytes": int(resident),
+        "resident_bytes_per_vector": round(resident / len(_ids), 1) if _ids else 0.0
+    }
@@ -32,6 +32,7 @@ import chromadb
 # This is intentional: it's the singleton that prevents repeated ingestion.
 _client = None
 _collection = None
+_child_collection = None
 
 
 def create_chroma_collection():
@@ -62,4 +63,26 @@ def create_chroma_collection():
         name="policy_collection"
     )
 
-    return _collection
\ No newline at end of file
+    return _collection
+
+
+def create_child_collection():
+    """
+    Returns the collection of sentence-window child chunks used by
+    hierarchical retrieval (see src/retrieval/hierarchical_retrieval.py).
+
+    Same singleton pattern and client as the main collection, kept
+    separate so flat retrieval never sees the children.
+    """
+    global _child_collection
+
+    if _child_collection is not None:
+        return _child_collection
+
+    create_chroma_collection()  # ensures the shared client exists
+
+    _child_collection = _client.get_or_create_collection(
+        name="policy_children"
+    )
+
+    return _child_collection
@@ -0,0 +1,202 @@
+"""
+metadata_index.py
+-----------------
+In-memory inverted index over chunk metadata (source, section, tags).
+
+Place this file at: src/vectorstore/metadata_index.py
+
+Why keep an index next to ChromaDB?
+    ChromaDB can pre-filter a query with a `where` clause, but it cannot
+    answer "which section numbers start with 5.?" or "how many chunks
+    does this scope match?" without scanning every record.
+
+    The postings kept here (field → value → chunk ids) answer both in
+    O(number of distinct values), which lets retrieve_chunks:
+        - expand a section prefix like "5.*" into an exact `$in` filter
+        - return immediately when a scope matches nothing
+        - score tiny scopes exactly instead of walking the HNSW graph
+
+    Deduplicated chunks (see near_duplicates.py) are also indexed under
+    every section and source they were merged from ("ref_section" /
+    "ref_source" postings) and under those sources' tags, so a scope on
+    any of those places finds them. A scope naming both a source and a
+    section uses "ref_pair" postings (source::section), so a reference
+    only matches when one place has both.
+
+    Like the collection itself (see chroma_store.py), the index lives in
+    module-level state for the lifetime of the server process and is
+    filled by store_chunks() during ingestion.
+"""
+
+
+import json
+
+
+# collection → field → value → set of chunk ids. "chunks" is the flat
+# collection; "children" the hierarchical retrieval children, which carry
+# plain source / section / tag fields and no references.
+_indexes = {}
+
+
+def index_chunk_metadata(ids, metadatas, collection="chunks"):
+    """
+    Adds stored chunks to the inverted index.
+
+    Args:
+        ids        : Chunk ids exactly as written to ChromaDB.
+        metadatas  : The cleaned (string-valued) metadata dicts for those ids.
+        collection : Which index — "chunks" or "children".
+    """
+    index = _indexes.setdefault(collection, {})
+    for chunk_id, metadata in zip(ids, metadatas):
+        for field in ("source", "section_number"):
+            value = metadata.get(field)
+            if value is not None:
+                index.setdefault(field, {}).setdefault(value, set()).add(chunk_id)
+
+        for tag in metadata.get("tags", "").split(","):
+            if tag:
+                index.setdefault("tag", {}).setdefault(tag, set()).add(chunk_id)
+
+        for ref in json.loads(metadata.get("references", "[]")):
+            for field, ref_field in (("source", "ref_source"), ("section_number", "ref_section")):
+                value = ref.get(field)
+                if value is not None:
+                    index.setdefault(ref_field, {}).setdefault(value, set()).add(chunk_id)
+            if ref.get("source") is not None and ref.get("section_number") is not None:
+                pair = f"{ref['source']}::{ref['section_number']}"
+                index.setdefault("ref_pair", {}).setdefault(pair, set()).add(chunk_id)
+            # A referenced document's tags scope the chunk like its own
+            # (store_chunks sets the matching tag_* flags)
+            for tag in ref.get("tags") or []:
+                index.setdefault("tag", {}).setdefault(tag, set()).add(chunk_id)
+
+
+def clear_metadata_index():
+    """Drops every posting. run_ingestion() calls it before storing anything."""
+    _indexes.clear()
+
+
+def match_sections(section, collection="chunks"):
+    """
+    Resolves a section filter to the indexed section numbers it covers.
+
+    "5.2" matches exactly that section; "5.*" matches section 5 and every
+    subsection below it (5.1, 5.2.3, ...), but not 50 or 51.
+    """
+    index = _indexes.get(collection, {})
+    known = index.get("section_number", {}).keys() | index.get("ref_section", {}).keys()
+
+    if section.endswith(".*"):
+        prefix = section[:-2]
+        return sorted(
+            value for value in known
+            if value == prefix or value.startswith(prefix + ".")
+        )
+
+    return [section] if section in known else []
+
+
+def resolve_scope(filters, collection="chunks"):
+    """
+    Turns API scope filters into a ChromaDB `where` clause plus the set of
+    chunk ids that satisfy it.
+
+    Args:
+        filters    : dict with any of "source" (str), "section" (str, e.g. "5.*")
+                     and "tags" (list of str; a chunk must carry all of them).
+        collection : Which index to resolve against — "chunks" or "children".
+
+    Returns:
+        None if no filter is set (search the whole corpus), otherwise a
+        (where, candidate_ids) tuple. An empty candidate set means the scope
+        matches nothing and the vector store does not need to be queried.
+    """
+    if not filters:
+        return None
+
+    source = filters.get("source")
+    section = filters.get("section")
+    tags = filters.get("tags") or []
+
+    if not (source or section or tags):
+        return None
+
+    index = _indexes.get(collection, {})
+
+    conditions = []
+    postings = []
+
+    if source and section:
+        # One place must match both: the chunk's own (source, section), or
+        # one of its references as a source::section pair
+        sections = match_sections(section, collection)
+        by_section = index.get("section_number", {})
+        by_pair = index.get("ref_pair", {})
+
+        own = [value for value in sections if value in by_section]
+        pairs = [f"{source}::{value}" for value in sections if f"{source}::{value}" in by_pair]
+
+        alternatives = []
+        if own:
+            own_condition = {"section_number": own[0]} if len(own) == 1 else {"section_number": {"$in": own}}
+            alternatives.append({"$and": [{"source": source}, own_condition]})
+        alternatives.extend({f"ref_{pair}": "true"} for pair in pairs)
+
+        if len(alternatives) == 1:
+            conditions.append(alternatives[0])
+        elif alternatives:
+            conditions.append({"$or": alternatives})
+        else:
+            conditions.append({"section_number": {"$in": []}})
+
+        own_ids = index.get("source", {}).get(source, set()) & set().union(
+            *(by_section[value] for value in own)
+        )
+        postings.append(own_ids.union(*(by_pair[pair] for pair in pairs)))
+
+    elif source:
+        ref_ids = index.get("ref_source", {}).get(source, set())
+        condition = {"source": source}
+        if ref_ids:
+            condition = {"$or": [condition, {f"ref_source_{source}": "true"}]}
+        conditions.append(condition)
+        postings.append(index.get("source", {}).get(source, set()) | ref_ids)
+
+    elif section:
+        sections = match_sections(section, collection)
+        by_section = index.get("section_number", {})
+        by_ref = index.get("ref_section", {})
+
+        own = [value for value in sections if value in by_section]
+        alternatives = []
+        if len(own) == 1:
+            alternatives.append({"section_number": own[0]})
+        elif own:
+            alternatives.append({"section_number": {"$in": own}})
+        alternatives.extend({f"ref_section_{value}": "true"} for value in sections if value in by_ref)
+
+        if len(alternatives) == 1:
+            conditions.append(alternatives[0])
+        elif alternatives:
+            conditions.append({"$or": alternatives})
+        else:
+            conditions.append({"section_number": {"$in": []}})
+
+        postings.append(set().union(
+            *(by_section.get(value, set()) | by_ref.get(value, set()) for value in sections)
+        ))
+
+    for tag in tags:
+        conditions.append({f"tag_{tag}": "true"})
+        postings.append(index.get("tag", {}).get(tag, set()))
+
+    where = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    # Intersect smallest-first so narrow scopes stay cheap
+    postings.sort(key=len)
+    candidate_ids = set(postings[0])
+    for ids in postings[1:]:
+        candidate_ids &= ids
+
+    return where, candidate_ids
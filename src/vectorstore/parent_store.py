@@ -0,0 +1,37 @@
+"""
+parent_store.py
+---------------
+Section parents for hierarchical retrieval, kept as sentence lists.
+
+Place this file at: src/vectorstore/parent_store.py
+
+Parents are never searched, only looked up by the parent_id in a child's
+metadata (see src/chunking/sentence_window.py), so they do not need to be
+in ChromaDB. Like metadata_index.py, the store is module-level state
+filled during ingestion and kept for the life of the process.
+"""
+
+
+_parents = []
+
+
+def add_parents(parents):
+    """Stores parents from build_hierarchy(); their index is their parent_id."""
+    _parents.extend(parents)
+
+
+def get_parent(parent_id):
+    """The {"sentences", "metadata"} record for `parent_id` (int or str)."""
+    return _parents[int(parent_id)]
+
+
+def clear_parents():
+    """Drops every parent. run_ingestion() calls it before storing anything."""
+    _parents.clear()
+
+
+def parent_store_stats():
+    return {
+        "parents": len(_parents),
+        "sentences": sum(len(parent["sentences"]) for parent in _parents)
+    }
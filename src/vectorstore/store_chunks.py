@@ -1,26 +1,113 @@
+import json
+
+from src.chunking.chunk_store import ChunkStore
+from src.config.settings import STORE_BATCH_SIZE, BINARY_INDEX_ENABLED
+from src.vectorstore.metadata_index import index_chunk_metadata
+from src.vectorstore.binary_index import add_to_binary_index
+
+
+def _clean_metadata(metadata):
+    """Drops None values and stringifies the rest — the types ChromaDB accepts."""
+    clean_metadata = {}
+
+    for key, value in metadata.items():
+        if value is None:
+            continue
+
+        if key == "tags":
+            # ChromaDB metadata cannot hold lists — keep a readable
+            # "a,b" string plus one flag per tag for `where` filtering
+            clean_metadata["tags"] = ",".join(value)
+            for tag in value:
+                clean_metadata[f"tag_{tag}"] = "true"
+        elif key == "references":
+            # Other places a deduplicated chunk's text appears: the full list
+            # as JSON for citing sources, plus flags so scope filters on
+            # those sections, sources and their tags still match this chunk
+            clean_metadata["references"] = json.dumps(value)
+            for ref in value:
+                if ref.get("section_number") is not None:
+                    clean_metadata[f"ref_section_{ref['section_number']}"] = "true"
+                if ref.get("source") is not None:
+                    clean_metadata[f"ref_source_{ref['source']}"] = "true"
+                if ref.get("source") is not None and ref.get("section_number") is not None:
+                    # Both at once, so a source + section scope matches one place
+                    clean_metadata[f"ref_{ref['source']}::{ref['section_number']}"] = "true"
+                for tag in ref.get("tags") or []:
+                    clean_metadata[f"tag_{tag}"] = "true"
+        else:
+            clean_metadata[key] = str(value) # ensuring string type
+
+    return clean_metadata
+
+
 def store_chunks(collection, chunks, embeddings):
-    ids= []
-    documents = []
-    metadatas = []
+    """
+    Writes chunks and their embeddings to ChromaDB in batches.
+
+    Args:
+        chunks     : ChunkStore (a legacy list of {"text", "metadata"} dicts
+                     is converted first).
+        embeddings : float32 ndarray, one row per chunk.
+    """
+    if not isinstance(chunks, ChunkStore):
+        chunks = ChunkStore.from_records(chunks)
+
+    # Chunks sharing a source and section share metadata apart from
+    # chunk_id, so each distinct combination is cleaned only once.
+    # Canonical chunks carrying references are cleaned individually.
+    cleaned_by_refs = {}
+
+    for start in range(0, len(chunks), STORE_BATCH_SIZE):
+        stop = min(start + STORE_BATCH_SIZE, len(chunks))
+
+        ids = [f"chunk_{i}" for i in range(start, stop)]
+        metadatas = []
+
+        for i in range(start, stop):
+            if chunks.has_references(i):
+                metadatas.append({**_clean_metadata(chunks.metadata(i)), "chunk_id": str(i)})
+                continue
+            refs = chunks.refs(i)
+            shared = cleaned_by_refs.get(refs)
+            if shared is None:
+                shared = cleaned_by_refs[refs] = _clean_metadata(chunks.metadata(i))
+            metadatas.append({**shared, "chunk_id": str(i)})
 
-    for i, chunk in enumerate(chunks):
+        collection.add(
+            ids=ids,
+            documents=chunks.texts(start, stop),
+            embeddings=embeddings[start:stop].tolist(),
+            metadatas=metadatas
+        )
 
-        ids.append(f"chunk_{i}")
-        documents.append(chunk["text"])
+        # Keep the scope (and binary first-stage) index in step with what
+        # the collection holds
+        index_chunk_metadata(ids, metadatas)
+        if BINARY_INDEX_ENABLED:
+            add_to_binary_index(ids, embeddings[start:stop])
 
-        # ---- CLEAN METADATA ----
-        clean_metadata = {}
 
-        for key, value in chunk["metadata"].items():
-            if value is not None:
-                clean_metadata[key] = str(value) # ensuring string type
+def store_child_chunks(collection, children, embeddings):
+    """
+    Writes hierarchical retrieval children (see sentence_window.py) to
+    their own collection in batches. They get their own scope index
+    ("children"); the binary index describes the flat collection only.
 
-        metadatas.append(clean_metadata)
+    Args:
+        children   : list of {"text", "metadata"} from build_hierarchy().
+        embeddings : float32 ndarray, one row per child.
+    """
+    for start in range(0, len(children), STORE_BATCH_SIZE):
+        batch = children[start:start + STORE_BATCH_SIZE]
 
+        ids = [f"child_{i}" for i in range(start, start + len(batch))]
+        metadatas = [_clean_metadata(child["metadata"]) for child in batch]
 
-    collection.add(
-        ids=ids,
-        documents=documents,
-        embeddings=embeddings.tolist(),
-        metadatas=metadatas
-    )
\ No newline at end of file
+        collection.add(
+            ids=ids,
+            documents=[child["text"] for child in batch],
+            embeddings=embeddings[start:start + len(batch)].tolist(),
+            metadatas=metadatas
+        )
+        index_chunk_metadata(ids, metadatas, collection="children")
@@ -1,41 +1,170 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+import json
 import os
+import time
+from collections import OrderedDict
 
 BACKEND_URL = os.getenv("BACKEND_URL", "").rstrip("/")
 
+# Answers kept per browser session for repeated questions (least recently used evicted)
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 64))
+
 st.set_page_config(
     page_title="Enterprise Policy RAG",
     page_icon="🔐",
     layout="wide"
 )
 
+
+@st.cache_resource
+def get_http_session():
+    """
+    One pooled, keep-alive HTTP session per Streamlit server process.
+    Streamlit reruns this whole script on every interaction — without the
+    cache each rerun would open a fresh TCP/TLS connection to the backend.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def cache_key(question, source, section, tags):
+    """Repeated questions (ignoring case and spacing) within the same scope share a key."""
+    normalized = " ".join(question.lower().split())
+    return json.dumps([normalized, source, section, sorted(tags)])
+
+
+def cache_get(cache, key):
+    """Cached result for `key`, marked most recently used, or None."""
+    if key not in cache:
+        return None
+    cache.move_to_end(key)
+    return cache[key]
+
+
+def cache_put(cache, key, result):
+    """Stores `result`, evicting the least recently used beyond ANSWER_CACHE_MAX_ENTRIES."""
+    cache[key] = result
+    cache.move_to_end(key)
+    while len(cache) > ANSWER_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+class ServerBusy(Exception):
+    """The backend shed the request (LLM rate-limit queue full); retry later."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"The assistant is busy right now. Please try again in {retry_after or 'a few'} seconds.")
+
+
+def stream_answer(payload, placeholder):
+    """
+    Calls /ask/stream and renders tokens into `placeholder` as they arrive.
+
+    Returns the final structured result with client-side timings (ms) attached:
+        connect — request sent → response headers received. The backend
+                  sends headers before retrieval or the LLM queue, so this
+                  is connection + routing time, not server-side waiting
+                  (see llm_queue_ms in the result for that).
+        ttft  — request sent → first answer token
+        total — request sent → final result
+    """
+    session = get_http_session()
+    start = time.perf_counter()
+
+    # (connect timeout, max gap between streamed lines)
+    with session.post(f"{BACKEND_URL}/ask/stream", json=payload, stream=True, timeout=(5, 60)) as response:
+        connect_ms = (time.perf_counter() - start) * 1000
+
+        if response.status_code in (429, 503):
+            raise ServerBusy(response.headers.get("retry-after"))
+        if response.status_code != 200:
+            raise RuntimeError(f"Backend returned status {response.status_code}. Response: {response.text}")
+
+        answer_so_far = ""
+        ttft_ms = None
+        result = None
+
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            event = json.loads(line)
+
+            if event["type"] == "token":
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                answer_so_far += event["text"]
+                placeholder.markdown(answer_so_far + "▌")
+            elif event["type"] == "result":
+                result = event["result"]
+            elif event["type"] == "shed":
+                raise ServerBusy(event.get("retry_after"))
+            elif event["type"] == "error":
+                raise RuntimeError(event["error"])
+
+    if result is None:
+        raise RuntimeError("Stream ended without a result.")
+
+    total_ms = (time.perf_counter() - start) * 1000
+    result["client_timings"] = {
+        "connect_ms": round(connect_ms),
+        "ttft_ms": round(ttft_ms) if ttft_ms is not None else None,
+        "total_ms": round(total_ms)
+    }
+    return result
+
+
 st.title("🔐 Enterprise Information Security Policy Assistant")
 st.markdown("Grounded · Confidence-Scored RAG System")
 
 if "history" not in st.session_state:
     st.session_state.history = []
 
+# Results already seen in this session, keyed by cache_key(), LRU-bounded
+if "answer_cache" not in st.session_state:
+    st.session_state.answer_cache = OrderedDict()
+
+with st.sidebar:
+    st.markdown("### Search scope")
+    scope_source = st.text_input("Document (file name)").strip()
+    scope_section = st.text_input("Section (e.g. 5.2 or 5.*)").strip()
+    scope_tags = [t.strip() for t in st.text_input("Tags (comma-separated)").split(",") if t.strip()]
+
 user_query = st.text_input("Ask a question about the policy document:")
 
 if st.button("Submit"):
     if user_query.strip() == "":
         st.warning("Please enter a question.")
     else:
-        with st.spinner("Retrieving and generating answer..."):
+        key = cache_key(user_query, scope_source, scope_section, scope_tags)
+        cached = cache_get(st.session_state.answer_cache, key)
+
+        if cached is not None:
+            result = dict(cached, client_timings={"connect_ms": 0, "ttft_ms": 0, "total_ms": 0}, cached=True)
+            st.session_state.history.append(result)
+        else:
+            payload = {
+                "question": user_query,
+                "source": scope_source or None,
+                "section": scope_section or None,
+                "tags": scope_tags or None
+            }
+            live_answer = st.empty()
             try:
-                response = requests.post(
-                    f"{BACKEND_URL}/ask",
-                    json={"question": user_query},
-                    timeout=120
-                )
-                if response.status_code == 200:
-                    result = response.json()
-                    st.session_state.history.append(result)
-                else:
-                    st.error(f"Backend returned status {response.status_code}. Response: {response.text}")
+                with st.spinner("Retrieving and generating answer..."):
+                    result = stream_answer(payload, live_answer)
+                cache_put(st.session_state.answer_cache, key, result)
+                st.session_state.history.append(result)
+            except ServerBusy as e:
+                st.warning(str(e))
             except Exception as e:
                 st.error(f"Error: {str(e)}")
+            # The finished answer is rendered in the history below
+            live_answer.empty()
 
 for i, result in enumerate(reversed(st.session_state.history)):
     st.markdown("---")
@@ -47,9 +176,20 @@ for i, result in enumerate(reversed(st.session_state.history)):
     col2.metric("Confidence Level", result.get("confidence_level", "N/A"))
     col3.metric("Grounded?", str(result.get("grounded_in_context", "N/A")))
 
+    timings = result.get("client_timings", {})
+    if result.get("cached"):
+        st.caption("Served from this session's cache")
+    elif timings:
+        st.caption(
+            f"Connect {timings['connect_ms']} ms · "
+            f"LLM queue {result.get('llm_queue_ms', 'N/A')} ms · "
+            f"First token {timings['ttft_ms'] if timings['ttft_ms'] is not None else 'N/A'} ms · "
+            f"Total {timings['total_ms']} ms"
+        )
+
     st.markdown("### Sources")
     for src in result.get("sources", []):
         st.write(f"• Section {src.get('section_number')} – {src.get('section_title')}")
 
     with st.expander("Debug Info (raw JSON output)"):
-        st.json(result)
\ No newline at end of file
+        st.json(result)
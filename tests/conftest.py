@@ -0,0 +1,36 @@
+"""
+conftest.py
+-----------
+Shared test setup.
+
+The functions under test (token_spans, length_sorted_batches,
+expand_context) are pure, but their modules import the embedding stack
+(torch + sentence-transformers) at the top. Where that stack is not
+installed, the two embedding modules are replaced by empty stand-ins so
+the pure functions still import. With the full requirements installed the
+real modules are used.
+
+src/config/settings.py refuses to import without GROQ_API_KEY; no test
+calls Groq, so a placeholder is set when none is configured.
+"""
+
+import os
+import sys
+import types
+
+os.environ.setdefault("GROQ_API_KEY", "test-key-unused")
+
+try:
+    import sentence_transformers  # noqa: F401
+except ImportError:
+    def _unavailable(*args, **kwargs):
+        raise RuntimeError("The embedding model is not installed in this environment")
+
+    for name, attrs in (
+        ("src.embeddings.inference", ("get_embedding_model", "get_cross_encoder", "predict_bucketed")),
+        ("src.embeddings.query_cache", ("embed_query", "embed_queries", "load_seed_questions")),
+    ):
+        module = types.ModuleType(name)
+        for attr in attrs:
+            setattr(module, attr, _unavailable)
+        sys.modules[name] = module
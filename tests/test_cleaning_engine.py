@@ -0,0 +1,70 @@
+"""Tests for boilerplate detection in src/cleaning/cleaning_engine.py."""
+
+from src.cleaning.cleaning_engine import clean_document_pages, detect_boilerplate, normalize_line
+
+
+def pages(texts, source="policy.pdf"):
+    return [{"text": text, "metadata": {"source": source, "page": i + 1}} for i, text in enumerate(texts)]
+
+
+def long_page(i, n_pages):
+    return "\n".join([
+        "ACME Corp — Information Security Standard",
+        f"{i + 1}.1 Access Control",
+        f"Accounts for system {i} are reviewed every quarter.",
+        f"Privileged access on host {i} requires approval.",
+        f"Logs for cluster {i} are kept for a year.",
+        f"Keys in vault {i} rotate every ninety days.",
+        f"Backups of store {i} are encrypted.",
+        "Confidential — Internal Use Only",
+        f"Page {i + 1} of {n_pages}"
+    ])
+
+
+def test_body_text_on_short_pages_survives():
+    texts = [f"body text {i} unique." for i in range(10)]
+
+    cleaned, stats = clean_document_pages(pages(texts), workers=1)
+
+    assert [doc["text"] for doc in cleaned] == texts
+    assert stats["boilerplate_lines"] == 0
+
+
+def test_lines_differing_only_in_a_number_are_not_one_key():
+    assert normalize_line("Body text 3 unique.") != normalize_line("Body text 4 unique.")
+
+
+def test_page_counters_share_a_key():
+    assert normalize_line("Page 3 of 40") == normalize_line("page  12 of 40") == "page # of #"
+    assert normalize_line("3 / 40") == normalize_line("17 / 40")
+    assert normalize_line("- 3 -") == normalize_line("- 12 -")
+
+
+def test_running_headers_and_footers_are_removed():
+    texts = [long_page(i, 10) for i in range(10)]
+
+    cleaned, _ = clean_document_pages(pages(texts), workers=1)
+
+    for i, doc in enumerate(cleaned):
+        assert "ACME Corp" not in doc["text"]
+        assert "Confidential" not in doc["text"]
+        assert f"Page {i + 1} of 10" not in doc["text"]
+        assert f"Accounts for system {i} are reviewed every quarter." in doc["text"]
+        assert f"Backups of store {i} are encrypted." in doc["text"]
+
+
+def test_boilerplate_from_long_pages_is_removed_from_short_ones():
+    texts = [long_page(i, 12) for i in range(10)]
+    texts += ["ACME Corp — Information Security Standard\nAppendix A lists contacts.\nPage 11 of 12",
+              "ACME Corp — Information Security Standard\nEnd of document.\nPage 12 of 12"]
+
+    cleaned, _ = clean_document_pages(pages(texts), workers=1)
+
+    assert cleaned[10]["text"] == "Appendix A lists contacts."
+    assert cleaned[11]["text"] == "End of document."
+
+
+def test_short_pages_are_not_counted():
+    texts = ["Header\nOnly line"] * 10
+
+    assert detect_boilerplate(texts, edge=3) == frozenset()
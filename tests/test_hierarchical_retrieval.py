@@ -0,0 +1,112 @@
+"""Tests for expand_context() in src/retrieval/hierarchical_retrieval.py."""
+
+import pytest
+
+from src.retrieval.hierarchical_retrieval import expand_context
+from src.vectorstore.parent_store import add_parents, clear_parents
+
+SENTENCE_CHARS = 40     # 10 estimated tokens per sentence
+SENTENCE_TOKENS = 10
+
+
+def sentence(parent_id, i):
+    return f"Parent {parent_id} rule {i:02d}.".ljust(SENTENCE_CHARS, "x")
+
+
+@pytest.fixture(autouse=True)
+def parents():
+    clear_parents()
+    add_parents([
+        {
+            "sentences": [sentence(parent_id, i) for i in range(n_sentences)],
+            "metadata": {"source": "policy.pdf", "section_number": str(parent_id + 1)}
+        }
+        for parent_id, n_sentences in enumerate([12, 12, 3])
+    ])
+    yield
+    clear_parents()
+
+
+def hit(parent_id, start, stop):
+    # Metadata comes back from ChromaDB with string values
+    return {"parent_id": str(parent_id), "sent_start": str(start), "sent_end": str(stop)}
+
+
+def runs(doc):
+    """Sentences of each contiguous run in a block, split on the " … " gaps."""
+    return [
+        [run[i:i + SENTENCE_CHARS] for i in range(0, len(run), SENTENCE_CHARS + 1)]
+        for run in doc.split(" … ")
+    ]
+
+
+def sentences_of(docs):
+    return [s for doc in docs for run in runs(doc) for s in run]
+
+
+@pytest.mark.parametrize("budget", [10, 25, 40, 75, 130, 1000])
+def test_stays_within_budget(budget):
+    docs, _, used = expand_context([hit(0, 5, 6), hit(1, 2, 4), hit(2, 1, 2)], budget)
+
+    assert used <= budget
+    # `used` is exactly what was returned, each sentence counted once
+    assert used == len(sentences_of(docs)) * SENTENCE_TOKENS
+    assert len(set(sentences_of(docs))) == len(sentences_of(docs))
+
+
+def test_first_hit_is_kept_over_budget():
+    docs, _, used = expand_context([hit(0, 2, 5), hit(1, 0, 1)], budget=10)
+
+    assert docs == [" ".join(sentence(0, i) for i in range(2, 5))]
+    assert used == 3 * SENTENCE_TOKENS
+
+
+def test_windows_grow_around_their_hit():
+    docs, _, used = expand_context([hit(0, 5, 6)], budget=30)
+
+    assert docs == [" ".join(sentence(0, i) for i in (4, 5, 6))]
+    assert used == 30
+
+
+def test_small_section_ends_up_whole():
+    docs, _, _ = expand_context([hit(2, 1, 2)], budget=1000)
+
+    assert docs == [" ".join(sentence(2, i) for i in range(3))]
+
+
+def test_same_parent_hits_merge_into_one_block():
+    docs, metadata, _ = expand_context([hit(0, 1, 2), hit(0, 8, 9)], budget=20)
+
+    assert len(docs) == 1
+    assert docs[0] == f"{sentence(0, 1)} … {sentence(0, 8)}"
+    assert metadata == [{"source": "policy.pdf", "section_number": "1", "parent_id": "0"}]
+
+
+def test_gap_closes_once_windows_meet():
+    # 3 and 5 seeded, then 2 and 4 added; 4 joins both windows into one run
+    docs, _, used = expand_context([hit(0, 3, 4), hit(0, 5, 6)], budget=40)
+
+    assert docs == [" ".join(sentence(0, i) for i in range(2, 6))]
+    assert used == 40
+
+
+def test_overlapping_hits_count_shared_sentences_once():
+    docs, _, used = expand_context([hit(0, 2, 5), hit(0, 4, 7)], budget=50)
+
+    assert docs == [" ".join(sentence(0, i) for i in range(2, 7))]
+    assert used == 50
+
+
+def test_blocks_follow_best_hit_order():
+    docs, metadata, _ = expand_context([hit(1, 4, 5), hit(0, 4, 5), hit(1, 9, 10)], budget=30)
+
+    assert [m["parent_id"] for m in metadata] == ["1", "0"]
+    assert docs[0] == f"{sentence(1, 4)} … {sentence(1, 9)}"
+    assert docs[1] == sentence(0, 4)
+
+
+def test_hits_over_budget_after_the_first_are_skipped():
+    docs, metadata, used = expand_context([hit(0, 0, 2), hit(1, 0, 3), hit(2, 0, 1)], budget=30)
+
+    assert [m["parent_id"] for m in metadata] == ["0", "2"]
+    assert used == 30
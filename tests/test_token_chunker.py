@@ -0,0 +1,149 @@
+"""Tests for token_spans() and length_sorted_batches() in src/chunking/token_chunker.py."""
+
+import random
+import re
+
+import pytest
+
+from src.chunking.token_chunker import length_sorted_batches, token_spans
+
+
+def fake_offsets(text, piece_chars=4):
+    """
+    (char_start, char_end) per token, like a word-piece tokenizer: words
+    longer than piece_chars split into several pieces, punctuation is its
+    own token.
+    """
+    offsets = []
+    for match in re.finditer(r"\w+|[^\w\s]", text):
+        for start in range(match.start(), match.end(), piece_chars):
+            offsets.append((start, min(start + piece_chars, match.end())))
+    return offsets
+
+
+def policy_text(n_sentences, seed=0):
+    rng = random.Random(seed)
+    words = ["access", "must", "be", "reviewed", "quarterly", "by", "the", "information",
+             "security", "officer", "and", "all", "privileged", "accounts", "logged"]
+    sentences = []
+    for _ in range(n_sentences):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(3, 14)))
+        sentences.append(sentence.capitalize() + ".")
+    return " ".join(sentences)
+
+
+def word_starts(offsets):
+    return {0} | {i for i in range(1, len(offsets)) if offsets[i][0] > offsets[i - 1][1]}
+
+
+def assert_valid_spans(spans, n, max_tokens, overlap):
+    assert spans[0][0] == 0
+    assert spans[-1][1] == n
+
+    for start, stop in spans:
+        assert 0 < stop - start <= max_tokens
+
+    for (prev_start, prev_stop), (start, stop) in zip(spans, spans[1:]):
+        # Every token is covered: no gap between consecutive chunks
+        assert start <= prev_stop
+        # Progress: both ends move forward
+        assert start > prev_start
+        assert stop > prev_stop
+        # Overlap never exceeds the setting
+        assert prev_stop - start <= overlap
+
+
+# ── token_spans ──────────────────────────────────────────────────────────────
+
+def test_short_text_is_one_span():
+    text = "Passwords expire after ninety days."
+    offsets = fake_offsets(text)
+    assert token_spans(text, offsets, max_tokens=64, overlap=8) == [(0, len(offsets))]
+
+
+def test_empty_text_has_no_spans():
+    assert token_spans("", [], max_tokens=64, overlap=8) == []
+
+
+@pytest.mark.parametrize("max_tokens", [8, 16, 37, 64])
+@pytest.mark.parametrize("overlap", [0, 4, 16])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_spans_cover_progress_and_bound_overlap(max_tokens, overlap, seed):
+    text = policy_text(60, seed)
+    offsets = fake_offsets(text)
+
+    spans = token_spans(text, offsets, max_tokens, overlap)
+    assert_valid_spans(spans, len(offsets), max_tokens, overlap)
+
+
+def test_without_overlap_spans_partition_the_tokens():
+    text = policy_text(40)
+    offsets = fake_offsets(text)
+
+    spans = token_spans(text, offsets, max_tokens=20, overlap=0)
+    assert all(prev_stop == start for (_, prev_stop), (start, _) in zip(spans, spans[1:]))
+
+
+def test_chunks_end_on_sentence_boundaries_when_sentences_fit():
+    text = policy_text(40)
+    offsets = fake_offsets(text)
+
+    # Every sentence is at most 14 words x 3 pieces + ".", well under 64 tokens
+    for start, stop in token_spans(text, offsets, max_tokens=64, overlap=0):
+        assert text[offsets[stop - 1][0]:offsets[stop - 1][1]] == "."
+
+
+def test_long_sentence_is_cut_at_word_starts():
+    text = " ".join(["confidentiality"] * 80)    # one sentence, 4 pieces per word
+    offsets = fake_offsets(text)
+    starts = word_starts(offsets)
+
+    spans = token_spans(text, offsets, max_tokens=10, overlap=3)
+    assert_valid_spans(spans, len(offsets), max_tokens=10, overlap=3)
+    for start, stop in spans:
+        assert start in starts
+        assert stop == len(offsets) or stop in starts
+
+
+def test_word_longer_than_budget_still_progresses():
+    text = "x" * 200 + " end."
+    offsets = fake_offsets(text)
+
+    spans = token_spans(text, offsets, max_tokens=5, overlap=2)
+    assert_valid_spans(spans, len(offsets), max_tokens=5, overlap=2)
+
+
+# ── length_sorted_batches ────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batches_stay_within_padded_budget(seed):
+    rng = random.Random(seed)
+    lengths = [rng.randint(1, 256) for _ in range(500)]
+
+    batches = length_sorted_batches(lengths, max_batch_tokens=2048, max_batch_size=32)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 32
+        # Padded size: every item padded to the longest in its batch
+        assert len(batch) * max(lengths[i] for i in batch) <= 2048
+
+
+def test_batches_are_longest_first():
+    lengths = [3, 90, 12, 45, 7, 60]
+    batches = length_sorted_batches(lengths, max_batch_tokens=120, max_batch_size=8)
+
+    flat = [lengths[i] for batch in batches for i in batch]
+    assert flat == sorted(lengths, reverse=True)
+
+
+def test_item_longer_than_budget_gets_its_own_batch():
+    lengths = [10, 500, 10]
+    batches = length_sorted_batches(lengths, max_batch_tokens=100, max_batch_size=8)
+
+    assert batches[0] == [1]
+    assert sorted(batches[1]) == [0, 2]
+
+
+def test_no_lengths_no_batches():
+    assert length_sorted_batches([], max_batch_tokens=100, max_batch_size=8) == []